@@ -0,0 +1,153 @@
+"""asyncio interface to the process-pool computations
+
+Example::
+
+    async with ComputeService(max_workers=4) as service:
+        tiles = service.tiles(-2, 1, -1.5, 1.5, 1024, 2000, 8)
+        async with aclosing(tiles):
+            async for nx, ny, data in tiles:
+                ...
+        u, niter = await service.laplace(200)
+
+All requests share one pool of worker processes. A request for tiles has
+at most max_in_flight tiles submitted to the pool at any time, so that a
+long render does not delay other requests which are queued meanwhile.
+Cancelling a request removes its tiles not yet started from the pool;
+tiles already running are completed but their results are discarded.
+
+"""
+import asyncio
+from concurrent import futures
+from contextlib import aclosing
+from functools import partial
+
+import numpy as np
+
+from jacobi import laplace
+from mandelbrot_pool import mandelbrot_tile, tiles
+
+def carpet_image(nbase, nint, npts, ntimes):
+    # normalized probability density of the quantum carpet
+    from carpet import InfiniteWell, psi0
+
+    w = InfiniteWell(psi0=psi0, width=2, nbase=nbase, nint=nint)
+    x = np.linspace(-0.5*w.width, 0.5*w.width, npts)
+    t = np.linspace(0, np.pi/4, ntimes)
+    z = np.abs(w.psi(x, t))**2
+    return z/np.max(z)
+
+class ComputeService:
+    def __init__(self, max_workers=4, max_in_flight=None):
+        self.executor = futures.ProcessPoolExecutor(max_workers=max_workers)
+        self.max_in_flight = max_in_flight or max_workers
+        self._latest = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.shutdown()
+        return False
+
+    async def shutdown(self):
+        for task in self._latest.values():
+            task.cancel()
+        # waiting for the workers must not block the event loop
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, partial(
+            self.executor.shutdown, wait=True, cancel_futures=True))
+
+    async def run(self, function, *args):
+        """execute function(*args) in a worker process"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor,
+                                          partial(function, *args))
+
+    async def tiles(self, xmin, xmax, ymin, ymax, npts, nitermax, ndiv):
+        """yield the tiles (nx, ny, data) of the Mandelbrot set as completed
+
+           When leaving the iteration early, the generator should be
+           closed, e.g. by means of contextlib.aclosing, so that the
+           remaining tiles are cancelled.
+
+        """
+        paramlist = iter(tiles(xmin, xmax, ymin, ymax, npts, ndiv))
+        pending = set()
+        try:
+            while True:
+                while len(pending) < self.max_in_flight:
+                    params = next(paramlist, None)
+                    if params is None:
+                        break
+                    pending.add(asyncio.wrap_future(self.executor.submit(
+                        mandelbrot_tile, nitermax, *params)))
+                if not pending:
+                    return
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def mandelbrot(self, xmin, xmax, ymin, ymax, npts, nitermax, ndiv):
+        nlen = npts//ndiv
+        data = np.zeros((npts, npts), dtype=int)
+        async with aclosing(self.tiles(xmin, xmax, ymin, ymax, npts,
+                                       nitermax, ndiv)) as results:
+            async for nx, ny, result in results:
+                data[nx*nlen:(nx+1)*nlen, ny*nlen:(ny+1)*nlen] = result
+        return data
+
+    async def carpet(self, nbase=100, nint=1000, npts=500, ntimes=1000):
+        return await self.run(carpet_image, nbase, nint, npts, ntimes)
+
+    async def laplace(self, num_points, max_iter=5000, tolerance=1e-7):
+        return await self.run(laplace, num_points, max_iter, tolerance)
+
+    async def latest(self, key, coroutine):
+        """await coroutine after cancelling an earlier request with same key
+
+           Useful if only the most recent request of a client matters,
+           e.g. when a view of the Mandelbrot set is moved.
+
+        """
+        previous = self._latest.pop(key, None)
+        if previous is not None:
+            previous.cancel()
+        task = asyncio.ensure_future(coroutine)
+        self._latest[key] = task
+        try:
+            return await task
+        finally:
+            if self._latest.get(key) is task:
+                del self._latest[key]
+
+async def _demo():
+    import time
+
+    start = time.perf_counter()
+
+    async def report(name, coroutine):
+        try:
+            await coroutine
+            print(f'{name:12s} finished after {time.perf_counter()-start:6.2f}s')
+        except asyncio.CancelledError:
+            print(f'{name:12s} cancelled after {time.perf_counter()-start:6.2f}s')
+
+    async with ComputeService(max_workers=4) as service:
+        view = partial(service.mandelbrot, -2, 1, -1.5, 1.5, 512, 1000)
+        await asyncio.gather(
+            report('render', service.latest('view', view(16))),
+            report('laplace', service.laplace(100)),
+            report('carpet', service.carpet(npts=200, ntimes=200)))
+        # a second view supersedes the first one
+        first = asyncio.ensure_future(report(
+            'stale view', service.latest('client', view(8))))
+        await asyncio.sleep(0.5)
+        await report('new view', service.latest('client', view(8)))
+        await first
+
+if __name__ == '__main__':
+    asyncio.run(_demo())
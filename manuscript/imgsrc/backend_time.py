@@ -0,0 +1,44 @@
+"""compare thread and process backends of the Mandelbrot tile driver
+
+The execution times for both backends are determined as a function of
+the number of divisions per axis and written to backend_gil.dat or
+backend_nogil.dat depending on whether the GIL is enabled. To obtain
+both files, run the script on a free-threaded build of Python 3.13 or
+later once as is and once with the environment variable PYTHON_GIL=1.
+
+"""
+import argparse
+
+from backends import gil_enabled
+from benchmark import machine_info, measure, write_dat
+from mandelbrot_pool import mandelbrot
+
+def backend_sweep(ndivs, repeat, npts=1024, nitermax=2000, max_workers=4):
+    rows = []
+    for ndiv in ndivs:
+        times = {}
+        for backend in ('thread', 'process'):
+            times[backend] = measure(mandelbrot, -2, 1, -1.5, 1.5, npts,
+                                     nitermax, ndiv, max_workers, backend,
+                                     repeat=repeat)
+        (t_thread, iqr_thread), (t_process, iqr_process) = times.values()
+        rows.append((ndiv, t_thread, t_process, iqr_thread, iqr_process))
+    return 'ndiv t_thread t_process iqr_thread iqr_process', rows
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--npts', type=int, default=1024)
+    parser.add_argument('--nitermax', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    info = machine_info()
+    info['gil'] = gil_enabled()
+    columns, rows = backend_sweep((1, 2, 4, 8, 16, 32, 64), args.repeat,
+                                  args.npts, args.nitermax, args.workers)
+    filename = 'backend_gil.dat' if info['gil'] else 'backend_nogil.dat'
+    write_dat(filename, columns, rows, info)
+    for ndiv, t_thread, t_process, *_ in rows:
+        print(f'{ndiv:3d} threads {t_thread:8.3f}s processes {t_process:8.3f}s')
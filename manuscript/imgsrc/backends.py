@@ -0,0 +1,43 @@
+from concurrent import futures
+from multiprocessing import shared_memory
+import sys
+
+import numpy as np
+
+BACKENDS = ('process', 'thread')
+
+_shared = {}
+
+def gil_enabled():
+    # False only for a free-threaded build (PEP 703) running without GIL
+    return getattr(sys, '_is_gil_enabled', lambda: True)()
+
+def default_backend():
+    """threads if they can run Python code in parallel, processes otherwise"""
+    return 'process' if gil_enabled() else 'thread'
+
+def executor(backend, max_workers, initializer=None, initargs=()):
+    backend = backend or default_backend()
+    if backend == 'thread':
+        return futures.ThreadPoolExecutor(max_workers=max_workers,
+                                          initializer=initializer,
+                                          initargs=initargs)
+    if backend == 'process':
+        return futures.ProcessPoolExecutor(max_workers=max_workers,
+                                           initializer=initializer,
+                                           initargs=initargs)
+    raise ValueError(f'unknown backend {backend!r}, expected one of '
+                     f'{", ".join(BACKENDS)}')
+
+def attach_shared(key, name, shape, dtype):
+    """initializer of worker processes attaching to a shared memory block
+
+       The block is viewed as an array of the given shape and dtype
+       which the tasks obtain by means of shared(key).
+
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    _shared[key] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+def shared(key):
+    return _shared[key][1]
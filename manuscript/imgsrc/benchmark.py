@@ -0,0 +1,164 @@
+"""regenerate the timing data underlying the speedup figures
+
+Three sweeps are available:
+
+pool   Mandelbrot set in NumPy (mandelbrot_pool.py) with one and four
+       processes for 1 to 128 divisions per axis, read by parallel_time.py
+       in this directory (columns ndiv t4 t1)
+tiles  Mandelbrot set point by point in pure Python (mandelbrot_points.py)
+       with four processes for 1 to 512 divisions per axis compared to a
+       single process without subdivision, in the layout of
+       mandelbrot_timing/timing.dat read by parallel_time.py of the
+       presentation (columns ndiv t1 t4)
+numba  Riemann zeta function with the vectorize kernel of the chapter
+       (zeta_plain in zeta_numba.py) for 200 arguments as a function of
+       the number of threads, read by numba_parallel.py (columns
+       nthreads t)
+
+The kernels and parameters are those of the published data. Each time
+is the median of several runs. In the pool and numba sweeps, it is
+followed by the interquartile ranges, in the tiles sweep, which keeps
+the three columns of timing.dat, they are given in the header. The
+header lines starting with # record the format version and the machine
+on which the data were taken.
+
+"""
+import argparse
+import datetime
+import os
+import platform
+import re
+import time
+
+import numpy as np
+
+FORMAT_VERSION = 2
+POOL_NDIVS = tuple(2**n for n in range(8))
+TILE_NDIVS = tuple(2**n for n in range(10))
+NUMBA_NMAX = 10000000
+
+def cpu_model():
+    try:
+        with open('/proc/cpuinfo') as fh:
+            for line in fh:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def machine_info():
+    info = {'cpu': cpu_model(),
+            'cores': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__}
+    try:
+        import numba
+        info['numba'] = numba.__version__
+    except ImportError:
+        pass
+    return info
+
+def machine_name(cpu):
+    # short name of a CPU like i7-6700hq, used as file name
+    match = re.search(r'i[3579]-\w+|Ryzen \d+ \w+|EPYC \w+', cpu)
+    name = match.group(0) if match else cpu
+    return re.sub(r'[^\w-]+', '-', name).strip('-').lower()
+
+def measure(function, *args, repeat=5, warmup=1):
+    for _ in range(warmup):
+        function(*args)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter()-start)
+    q1, median, q3 = np.percentile(times, (25, 50, 75))
+    return median, q3-q1
+
+def pool_sweep(ndivs, repeat, npts=1024, nitermax=2000):
+    from mandelbrot_pool import mandelbrot
+
+    rows = []
+    for ndiv in ndivs:
+        t4, iqr4 = measure(mandelbrot, -2, 1, -1.5, 1.5, npts, nitermax,
+                           ndiv, 4, repeat=repeat)
+        t1, iqr1 = measure(mandelbrot, -2, 1, -1.5, 1.5, npts, nitermax,
+                           ndiv, 1, repeat=repeat)
+        rows.append((ndiv, t4, t1, iqr4, iqr1))
+    return 'ndiv t4 t1 iqr_t4 iqr_t1', rows
+
+def tile_sweep(ndivs, repeat, npts=1024, nitermax=2000):
+    from mandelbrot_points import mandelbrot
+
+    t1, iqr1 = measure(mandelbrot, -2, 1, -1.5, 1.5, npts, nitermax, 1, 1,
+                       repeat=repeat)
+    rows = []
+    for ndiv in ndivs:
+        t4, iqr4 = measure(mandelbrot, -2, 1, -1.5, 1.5, npts, nitermax,
+                           ndiv, 4, repeat=repeat)
+        rows.append((ndiv, t1, t4, iqr1, iqr4))
+    return 'ndiv t1 t4 iqr_t1 iqr_t4', rows
+
+def numba_sweep(nthreads, repeat, nmax=NUMBA_NMAX):
+    import numba
+    from zeta_numba import zeta_plain
+
+    x = np.linspace(2, 10, 200, dtype=np.float64)
+    rows = []
+    for n in nthreads:
+        if n > numba.config.NUMBA_NUM_THREADS:
+            break
+        numba.set_num_threads(n)
+        t, iqr = measure(zeta_plain, x, nmax, repeat=repeat)
+        rows.append((n, t, iqr))
+    return 'nthreads t iqr_t', rows
+
+def write_dat(filename, columns, rows, info, ncols=None):
+    # only the first ncols columns are written as data, the remaining ones
+    # are recorded in the header
+    columns = columns.split()
+    ncols = ncols or len(columns)
+    with open(filename, 'w') as fh:
+        fh.write(f'# format {FORMAT_VERSION}\n')
+        fh.write(f'# date {datetime.date.today().isoformat()}\n')
+        for key, value in info.items():
+            fh.write(f'# {key} {value}\n')
+        for nr, column in enumerate(columns[ncols:], start=ncols):
+            values = ' '.join(f'{row[nr]:.3f}' for row in rows)
+            fh.write(f'# {column} {values}\n')
+        fh.write(f'# {" ".join(columns[:ncols])}\n')
+        for n, *times in rows:
+            fh.write(f'{n:3d} '+' '.join(f'{t:7.3f}' for t in times[:ncols-1])
+                     +'\n')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('sweep', choices=('pool', 'tiles', 'numba'))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--npts', type=int, default=1024)
+    parser.add_argument('--nitermax', type=int, default=2000)
+    parser.add_argument('--nmax', type=int, default=NUMBA_NMAX)
+    parser.add_argument('--output', help='name of the data file')
+    args = parser.parse_args()
+
+    info = machine_info()
+    name = machine_name(info['cpu'])
+    ncols = None
+    if args.sweep == 'pool':
+        columns, rows = pool_sweep(POOL_NDIVS, args.repeat, args.npts,
+                                   args.nitermax)
+        filename = args.output or f'{name}.dat'
+    elif args.sweep == 'tiles':
+        columns, rows = tile_sweep(TILE_NDIVS, args.repeat, args.npts,
+                                   args.nitermax)
+        ncols = 3
+        filename = args.output or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            '..', '..', 'presentation', 'images', 'src', f'{name}.dat')
+    else:
+        columns, rows = numba_sweep(range(1, 9), args.repeat, args.nmax)
+        filename = args.output or f'numba_parallel-{name}.dat'
+    write_dat(filename, columns, rows, info, ncols)
+    print(f'{args.sweep} sweep written to {filename}')
@@ -0,0 +1,196 @@
+"""store benchmark timings per commit and machine and detect regressions
+
+usage:
+  python benchstore.py list
+  python benchstore.py run NAME [NAME ...] [--repeat N]
+  python benchstore.py compare NAME --base COMMIT [--commit COMMIT]
+  python benchstore.py history NAME [--output FILE]
+
+The timings are kept in the SQLite database benchmarks.sqlite next to
+this script, irrespective of the working directory. Two
+commits are compared by a bootstrap confidence interval for the ratio
+of the median execution times. No network access is needed.
+
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import timeit
+
+import numpy as np
+
+DATABASE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'benchmarks.sqlite')
+
+def _mandelbrot_tile():
+    from mandelbrot_pool import mandelbrot_tile, tiles
+
+    nx, ny, cx, cy = tiles(-2, 1, -1.5, 1.5, 256, 1)[0]
+    return lambda: mandelbrot_tile(200, nx, ny, cx, cy)
+
+def _jacobi_step():
+    from jacobi import initial_grid, jacobi_step
+
+    u = initial_grid(500)
+    return lambda: jacobi_step(u)
+
+def _chain_diff():
+    from chain import Chain
+
+    chain = Chain(100, 1, 0.1)
+    y = np.linspace(0, 1, 2*chain.nlinks)
+    return lambda: chain.diff(0, y)
+
+def _sin():
+    x = np.linspace(0, 10, 1000000)
+    return lambda: np.sin(x)
+
+# each entry returns a function without arguments to be timed
+BENCHMARKS = {'mandelbrot_tile': _mandelbrot_tile,
+              'jacobi_step': _jacobi_step,
+              'chain_diff': _chain_diff,
+              'sin': _sin}
+
+def connect(filename=DATABASE):
+    db = sqlite3.connect(filename)
+    db.execute('CREATE TABLE IF NOT EXISTS results '
+               '(benchmark TEXT, commit_id TEXT, machine TEXT, '
+               'date TEXT, times TEXT)')
+    return db
+
+def current_commit():
+    # a trailing -dirty marks uncommitted changes in the working tree
+    result = subprocess.run(['git', 'describe', '--always', '--dirty'],
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+def current_machine():
+    return platform.node()
+
+def record(db, benchmark, times, commit=None, machine=None):
+    commit = commit or current_commit()
+    machine = machine or current_machine()
+    with db:
+        db.execute('INSERT INTO results VALUES (?, ?, ?, ?, ?)',
+                   (benchmark, commit, machine,
+                    datetime.datetime.now().isoformat(timespec='seconds'),
+                    json.dumps(list(times))))
+
+def load(db, benchmark, commit, machine=None):
+    # all timings recorded for a commit, several runs are combined
+    machine = machine or current_machine()
+    rows = db.execute('SELECT times FROM results WHERE benchmark=? '
+                      'AND commit_id=? AND machine=?',
+                      (benchmark, commit, machine)).fetchall()
+    if not rows:
+        raise KeyError(f'no results for {benchmark} at {commit} on {machine}')
+    return np.concatenate([json.loads(times) for times, in rows])
+
+def run(benchmark, repeat=20):
+    function = BENCHMARKS[benchmark]()
+    number = max(1, int(0.05/min(timeit.repeat(function, number=1, repeat=3))))
+    times = timeit.repeat(function, number=number, repeat=repeat)
+    return np.array(times)/number
+
+def bootstrap_median(times, nresamples=10000, confidence=0.95, seed=0):
+    """median of times and its bootstrap confidence interval"""
+    rng = np.random.default_rng(seed)
+    resamples = rng.choice(times, size=(nresamples, len(times)))
+    medians = np.median(resamples, axis=1)
+    alpha = (1-confidence)/2
+    low, high = np.quantile(medians, (alpha, 1-alpha))
+    return np.median(times), low, high
+
+def bootstrap_ratio(base, new, nresamples=10000, confidence=0.95, seed=0):
+    """ratio of the medians of new and base and its confidence interval
+
+       Both samples are resampled independently. A lower bound above
+       one indicates a significant slowdown, an upper bound below one
+       a significant speedup.
+
+    """
+    rng = np.random.default_rng(seed)
+    base_medians = np.median(rng.choice(base, size=(nresamples, len(base))),
+                             axis=1)
+    new_medians = np.median(rng.choice(new, size=(nresamples, len(new))),
+                            axis=1)
+    alpha = (1-confidence)/2
+    low, high = np.quantile(new_medians/base_medians, (alpha, 1-alpha))
+    return np.median(new)/np.median(base), low, high
+
+def compare(db, benchmark, base, commit=None, machine=None, threshold=0.):
+    """compare two commits, returns the ratio, its confidence interval
+       and whether a regression by more than threshold is significant
+
+    """
+    commit = commit or current_commit()
+    ratio, low, high = bootstrap_ratio(load(db, benchmark, base, machine),
+                                       load(db, benchmark, commit, machine))
+    return ratio, low, high, low > 1+threshold
+
+def history(db, benchmark, machine=None):
+    # commits in the order of their first measurement
+    machine = machine or current_machine()
+    commits = [commit for commit, in db.execute(
+        'SELECT commit_id FROM results WHERE benchmark=? AND machine=? '
+        'GROUP BY commit_id ORDER BY MIN(date)', (benchmark, machine))]
+    return [(commit,)+bootstrap_median(load(db, benchmark, commit, machine))
+            for commit in commits]
+
+def plot_history(db, benchmark, machine=None, filename=None):
+    import matplotlib.pyplot as plt
+
+    commits, medians, low, high = zip(*history(db, benchmark, machine))
+    medians = np.array(medians)
+    errors = np.array([medians-low, high-medians])
+    fig, ax = plt.subplots()
+    ax.errorbar(range(len(commits)), medians, yerr=errors, fmt='o-')
+    ax.set_xticks(range(len(commits)))
+    ax.set_xticklabels(commits, rotation=45, ha='right')
+    ax.set_ylabel('execution time (s)')
+    ax.set_title(benchmark)
+    fig.tight_layout()
+    if filename is None:
+        plt.show()
+    else:
+        fig.savefig(filename)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('command',
+                        choices=('list', 'run', 'compare', 'history'))
+    parser.add_argument('names', nargs='*')
+    parser.add_argument('--database', default=DATABASE)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--base')
+    parser.add_argument('--commit')
+    parser.add_argument('--machine')
+    parser.add_argument('--threshold', type=float, default=0.)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    db = connect(args.database)
+    if args.command == 'list':
+        for name in BENCHMARKS:
+            print(name)
+    elif args.command == 'run':
+        commit = args.commit or current_commit()
+        for name in args.names:
+            times = run(name, args.repeat)
+            record(db, name, times, commit, args.machine)
+            print(f'{name}: {np.median(times):.3e}s at {commit}')
+    elif args.command == 'compare':
+        for name in args.names:
+            ratio, low, high, regression = compare(
+                db, name, args.base, args.commit, args.machine,
+                args.threshold)
+            flag = 'REGRESSION' if regression else ''
+            print(f'{name}: {ratio:.3f} [{low:.3f}, {high:.3f}] {flag}')
+    else:
+        for name in args.names:
+            plot_history(db, name, args.machine, args.output)
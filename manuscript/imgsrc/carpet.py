@@ -0,0 +1,53 @@
+from math import sqrt
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib import cm
+
+class InfiniteWell:
+    def __init__(self, psi0, width, nbase, nint):
+        self.width = width
+        self.nbase = nbase
+        self.nint = nint
+        self.coeffs = trapezoidal(lambda x: psi0(x)*self.eigenfunction(x),
+                                  -0.5*self.width, 0.5*self.width, self.nint)
+
+    def eigenfunction(self, x):
+        assert x.ndim == 1
+        normalization = sqrt(2/self.width)
+        args = (np.arange(self.nbase)[:, np.newaxis]+1)*np.pi*x/self.width
+        result = np.empty((self.nbase, x.size))
+        result[0::2, :] = normalization*np.cos(args[0::2])
+        result[1::2, :] = normalization*np.sin(args[1::2])
+        return result
+
+    def psi(self, x, t):
+        coeffs = self.coeffs[:, np.newaxis]
+        eigenvals = np.arange(self.nbase)[:, np.newaxis]
+        tvals = t[:, np.newaxis, np.newaxis]
+        psit = np.sum(coeffs * self.eigenfunction(x)
+                      * np.exp(-1j*(eigenvals+1)**2*tvals), axis= -2)
+        return psit
+
+def trapezoidal(func, a, b, nint):
+    delta = (b-a)/nint
+    x = np.linspace(a, b, nint+1)
+    integrand = func(x)
+    integrand[..., 0] = 0.5*integrand[..., 0]
+    integrand[..., -1] = 0.5*integrand[..., -1]
+    return delta*np.sum(integrand, axis=-1)
+
+def psi0(x):
+    sigma = 0.005
+    return np.exp(-x**2/(2*sigma))/(np.pi*sigma)**0.25
+
+if __name__ == '__main__':
+    w = InfiniteWell(psi0=psi0, width=2, nbase=100, nint=1000)
+    x = np.linspace(-0.5*w.width, 0.5*w.width, 500)
+    t = np.linspace(0, np.pi/4, 1000)
+    z = np.abs(w.psi(x, t))**2
+    z = z/np.max(z)
+    plt.rc('text', usetex=True)
+    plt.imshow(z.T, cmap=cm.hot)
+    plt.xlabel('$t$', fontsize=20)
+    plt.ylabel('$x$', fontsize=20)
+    plt.show()
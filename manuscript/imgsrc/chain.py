@@ -0,0 +1,369 @@
+from functools import lru_cache
+import glob
+import os
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
+from matplotlib.collections import LineCollection
+from scipy.linalg import cho_factor, cho_solve, solve_banded
+from scipy.optimize import brentq, minimize
+from scipy.integrate import Radau, solve_ivp
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+def _fused_rhs(c, s, momenta2, d_momenta):
+    # subtracts (m*sij) applied to the squared momenta from d_momenta in
+    # O(n) operations. As in Chain.m_dot, the product of matrix_m with
+    # u = c*momenta2 and v = s*momenta2 only requires sums of prefix sums
+    # which are accumulated in a single backward loop.
+    n = c.shape[0]
+    usum = 0.
+    vsum = 0.
+    for i in range(n):
+        usum = usum+c[i]*momenta2[i]
+        vsum = vsum+s[i]*momenta2[i]
+    utail = 0.
+    vtail = 0.
+    ku = 0.
+    kv = 0.
+    for i in range(n-1, -1, -1):
+        u = c[i]*momenta2[i]
+        v = s[i]*momenta2[i]
+        ku = ku+usum-utail
+        kv = kv+vsum-vtail
+        utail = utail+u
+        vtail = vtail+v
+        mu = ku-0.5*usum-u/6
+        mv = kv-0.5*vsum-v/6
+        d_momenta[i] = d_momenta[i]-s[i]*mu+c[i]*mv
+
+if njit is not None:
+    _fused_rhs = njit(cache=True)(_fused_rhs)
+
+@lru_cache(maxsize=None)
+def chain_matrices(nlinks):
+    # the matrices only depend on the number of links and are shared by all
+    # chains of that size, they are therefore made read-only
+    m = np.fromfunction(lambda i, j: nlinks-np.maximum(i, j)-0.5,
+                        (nlinks, nlinks), dtype=np.float64)
+    m = m-np.identity(nlinks)/6
+    a = np.arange(nlinks, 0, -1)-0.5
+    damping = (-2*np.identity(nlinks, dtype=np.float64)
+                 +np.eye(nlinks, k=1)
+                 +np.eye(nlinks, k=-1))
+    damping[0, 0] = -1
+    damping[nlinks-1, nlinks-1] = -1
+    for array in (m, a, damping):
+        array.flags.writeable = False
+    return m, a, damping
+
+def trajectory_chunks(directory):
+    for filename in sorted(glob.glob(os.path.join(directory, 'chunk_*.npy'))):
+        yield np.load(filename)
+
+class Chain:
+    _equilibria = {}
+
+    def __init__(self, nlinks, length, damping, use_numba=False):
+        if nlinks < length:
+            raise ValueError('length requirement cannot be fulfilled with '
+                             'the given number of links')
+        if use_numba and njit is None:
+            raise ImportError('use_numba requires the numba package')
+        self.nlinks = nlinks
+        self.length = length
+        self.use_numba = use_numba
+        self.m = self.matrix_m()
+        self.a = self.vector_a()
+        self.damping = damping*chain_matrices(self.nlinks)[2]
+        self.gamma = damping
+        self._cs = np.empty((self.nlinks, 2), dtype=np.float64)
+        # banded storage of the 2n x 2n matrix used by solve_mass, only
+        # the diagonal and the first off-diagonals depend on the angles
+        self._band = np.zeros((5, 2*self.nlinks), dtype=np.float64)
+        self._band[0, 2:] = -1
+        self._band[4, :-2] = -1
+
+    def x_constraint(self, phi):
+        return np.sum(np.cos(phi))-self.length
+
+    def x_constraint_jac(self, phi):
+        return -np.sin(phi)
+
+    def y_constraint(self, phi):
+        return np.sum(np.sin(phi))
+
+    def y_constraint_jac(self, phi):
+        return np.cos(phi)
+
+    def f_energy(self, phi):
+        return np.sum(np.arange(self.nlinks, 0, -1)*np.sin(phi))
+
+    def f_energy_jac(self, phi):
+        return np.arange(self.nlinks, 0, -1)*np.cos(phi)
+
+    def catenary(self):
+        # the stationarity condition of the Lagrangian implies that tan(phi)
+        # increases linearly along the chain, the remaining parameter h is
+        # fixed by the horizontal constraint
+        k = np.arange(self.nlinks)-(self.nlinks-1)/2
+        if self.length >= self.nlinks:
+            return np.zeros(self.nlinks)
+        def g(h):
+            return np.sum(h/np.sqrt(h*h+k*k))-self.length
+        hmin = 1e-12
+        if g(hmin) >= 0:
+            return np.linspace(-0.1, 0.1, self.nlinks)
+        hmax = 1.
+        while g(hmax) < 0:
+            hmax = 2*hmax
+        return np.arctan(k/brentq(g, hmin, hmax))
+
+    def equilibrium(self, phi0=None, catenary=True):
+        # equilibria obtained from the default catenary start are cached in
+        # a class attribute, i.e. shared by all chains of the process with
+        # the same number of links and length, an explicit phi0 or
+        # catenary=False always leads to a new minimization
+        key = (self.nlinks, self.length)
+        use_cache = phi0 is None and catenary
+        if use_cache and key in self._equilibria:
+            return self._equilibria[key].copy()
+        if phi0 is None:
+            if catenary:
+                phi0 = self.catenary()
+            else:
+                phi0 = np.linspace(-0.1, 0.1, self.nlinks)
+        result = minimize(self.f_energy, phi0, jac=self.f_energy_jac,
+                          method='SLSQP',
+                          constraints=[{'type': 'eq', 'fun': self.x_constraint,
+                                        'jac': self.x_constraint_jac},
+                                       {'type': 'eq', 'fun': self.y_constraint,
+                                        'jac': self.y_constraint_jac}])
+        if use_cache and result.success:
+            self._equilibria[key] = result.x.copy()
+        return result.x
+
+    def coordinates(self, phis):
+        # phis may contain the angles of several configurations along the
+        # first axis, the coordinates of all of them are obtained at once
+        shape = phis.shape[:-1]+(self.nlinks+1,)
+        x = np.zeros(shape)
+        np.cumsum(np.cos(phis), axis=-1, out=x[..., 1:])
+        y = np.zeros(shape)
+        np.cumsum(np.sin(phis), axis=-1, out=y[..., 1:])
+        return x, y
+
+    def plot_equilibrium(self):
+        x, y = self.coordinates(self.equilibrium())
+        plt.plot(x, y)
+        plt.plot(x, y, 'o')
+        plt.gca().set_aspect('equal')
+        plt.show()
+
+    def matrix_m(self):
+        return chain_matrices(self.nlinks)[0]
+
+    def vector_a(self):
+        return chain_matrices(self.nlinks)[1]
+
+    def diff(self, t, y):
+        # m*cij is the kinetic energy matrix of the chain and thus symmetric
+        # and positive definite, so that a Cholesky factorization replaces
+        # the explicit inverse
+        momenta = y[:self.nlinks]
+        angles = y[self.nlinks:]
+        d_angles = momenta
+        ci = np.cos(angles)
+        cij = np.cos(angles[:,np.newaxis]-angles)
+        sij = np.sin(angles[:,np.newaxis]-angles)
+        d_momenta = -np.dot(self.m*sij, momenta*momenta)
+        d_momenta = d_momenta+np.dot(self.damping, momenta)
+        d_momenta = d_momenta-self.a*ci
+        d_momenta = cho_solve(cho_factor(self.m*cij), d_momenta)
+        d = np.empty_like(y)
+        d[:self.nlinks] = d_momenta
+        d[self.nlinks:] = d_angles
+        return d
+
+    def m_dot(self, x):
+        # matrix_m equals U U^T - e e^T/2 - I/6 with U an upper triangular
+        # matrix of ones, e a vector of ones and I the identity matrix, so
+        # that its product with a vector requires only cumsums
+        return np.cumsum(np.cumsum(x)[::-1])[::-1]-0.5*np.sum(x)-x/6
+
+    def damping_dot(self, x):
+        dx = np.diff(x)
+        result = np.zeros_like(x)
+        result[:-1] = dx
+        result[1:] = result[1:]-dx
+        return self.gamma*result
+
+    def solve_mass(self, c, s, b):
+        # solves (m*cij) x = b in O(n) operations per right-hand side. With
+        # K = U U^T, m*cij = C K C + S K S - (c c^T + s s^T)/2 - I/6 where C
+        # and S are diagonal matrices of cos(phi) and sin(phi) and I is the
+        # identity matrix. The inverse of K is tridiagonal, so that the
+        # Woodbury identity reduces the part without the rank-2 term to a
+        # banded system for the interleaved unknowns K C x and K S x. The
+        # rank-2 term is taken into account by the Woodbury identity once
+        # more.
+        band = self._band
+        kinv = np.full(self.nlinks, 2.)
+        kinv[0] = 1
+        band[2, 0::2] = kinv-6*c*c
+        band[2, 1::2] = kinv-6*s*s
+        band[1, 1::2] = -6*c*s
+        band[3, 0::2] = band[1, 1::2]
+        rhs = np.column_stack((b.reshape(self.nlinks, -1), c, s))
+        z = np.empty((2*self.nlinks, rhs.shape[1]))
+        z[0::2] = c[:, np.newaxis]*rhs
+        z[1::2] = s[:, np.newaxis]*rhs
+        z = solve_banded((2, 2), band, z, overwrite_b=True,
+                         check_finite=False)
+        x = -6*rhs-36*(c[:, np.newaxis]*z[0::2]+s[:, np.newaxis]*z[1::2])
+        xb = x[:, :-2]
+        xv = x[:, -2:]
+        v = rhs[:, -2:]
+        xb = xb+xv@np.linalg.solve(2*np.identity(2)-v.T@xv, v.T@xb)
+        return xb.reshape(b.shape)
+
+    def diff_fast(self, t, y):
+        # same as diff, but cos(phi_i-phi_j) and sin(phi_i-phi_j) are obtained
+        # from the addition theorems, and work arrays are reused between calls
+        momenta = y[:self.nlinks]
+        angles = y[self.nlinks:]
+        c = self._cs[:, 0]
+        s = self._cs[:, 1]
+        np.cos(angles, out=c)
+        np.sin(angles, out=s)
+        momenta2 = momenta*momenta
+        d_momenta = self.damping_dot(momenta)-self.a*c
+        if self.use_numba:
+            _fused_rhs(c, s, momenta2, d_momenta)
+        else:
+            d_momenta = (d_momenta-s*self.m_dot(c*momenta2)
+                         +c*self.m_dot(s*momenta2))
+        d = np.empty_like(y)
+        d[:self.nlinks] = self.solve_mass(c, s, d_momenta)
+        d[self.nlinks:] = momenta
+        return d
+
+    def jac(self, t, y):
+        momenta = y[:self.nlinks]
+        angles = y[self.nlinks:]
+        momenta2 = momenta*momenta
+        c = np.cos(angles)
+        s = np.sin(angles)
+        mcij = self.m*np.cos(angles[:,np.newaxis]-angles)
+        msij = self.m*np.sin(angles[:,np.newaxis]-angles)
+        d_momenta = (-np.dot(msij, momenta2)+np.dot(self.damping, momenta)
+                     -self.a*c)
+        d_momenta = self.solve_mass(c, s, d_momenta)
+        rhs = np.empty((self.nlinks, 2*self.nlinks))
+        rhs[:, :self.nlinks] = self.damping-2*msij*momenta
+        rhs[:, self.nlinks:] = mcij*momenta2-msij*d_momenta
+        diagonal = (self.a*s-np.dot(mcij, momenta2)
+                    +np.dot(msij, d_momenta))
+        rhs[:, self.nlinks:] += np.diag(diagonal)
+        j = np.zeros((2*self.nlinks, 2*self.nlinks))
+        j[:self.nlinks] = self.solve_mass(c, s, rhs)
+        j[self.nlinks:, :self.nlinks] = np.identity(self.nlinks)
+        return j
+
+    def solve_eq_of_motion(self, time_i, time_f, nt, angles=None):
+        y0 = np.zeros(2*self.nlinks, dtype=np.float64)
+        y0[self.nlinks:] = self.equilibrium() if angles is None else angles
+        self.solution = solve_ivp(self.diff_fast, (time_i, time_f), y0, method='Radau',
+                                  t_eval=np.linspace(time_i, time_f, nt),
+                                  jac=self.jac)
+
+    def stream_eq_of_motion(self, time_i, time_f, nt, directory,
+                            chunksize=100, angles=None):
+        # the states at the requested times are written to disk in chunks of
+        # chunksize rows as the integration proceeds, chunks of an earlier
+        # run in the same directory are removed since trajectory_chunks
+        # reads all of them
+        os.makedirs(directory, exist_ok=True)
+        for filename in glob.glob(os.path.join(directory, 'chunk_*.npy')):
+            os.remove(filename)
+        y0 = np.zeros(2*self.nlinks, dtype=np.float64)
+        y0[self.nlinks:] = self.equilibrium() if angles is None else angles
+        t_eval = np.linspace(time_i, time_f, nt)
+        np.save(os.path.join(directory, 'times.npy'), t_eval)
+        solver = Radau(self.diff_fast, time_i, y0, time_f, jac=self.jac)
+        chunk = np.empty((chunksize, 2*self.nlinks), dtype=np.float64)
+        nfilled = 0
+        nchunk = 0
+        nr = 0
+        while nr < nt:
+            message = solver.step()
+            if solver.status == 'failed':
+                raise RuntimeError(message)
+            solution = solver.dense_output()
+            while nr < nt and t_eval[nr] <= solver.t:
+                chunk[nfilled] = solution(t_eval[nr])
+                nfilled = nfilled+1
+                nr = nr+1
+                if nfilled == chunksize or nr == nt:
+                    np.save(os.path.join(directory, f'chunk_{nchunk:05d}.npy'),
+                            chunk[:nfilled])
+                    nfilled = 0
+                    nchunk = nchunk+1
+
+    def angle_chunks(self, directory=None):
+        if directory is None:
+            yield self.solution.y[self.nlinks:].T
+        else:
+            for chunk in trajectory_chunks(directory):
+                yield chunk[:, self.nlinks:]
+
+    def plot_dynamics(self, directory=None):
+        ax = plt.gca()
+        for phis in self.angle_chunks(directory):
+            x, y = self.coordinates(phis)
+            ax.add_collection(LineCollection(np.stack((x, y), axis=-1),
+                                             colors='b'))
+        ax.autoscale_view()
+        ax.set_aspect('equal')
+        plt.show()
+
+    def animate_dynamics(self, directory=None, filename=None, interval=40):
+        # the frames are computed chunk by chunk, a first pass only serves
+        # to determine the number of frames and the extent of the plot
+        nframes = 0
+        xmin = ymin = np.inf
+        xmax = ymax = -np.inf
+        for phis in self.angle_chunks(directory):
+            x, y = self.coordinates(phis)
+            nframes = nframes+len(phis)
+            xmin, xmax = min(xmin, x.min()), max(xmax, x.max())
+            ymin, ymax = min(ymin, y.min()), max(ymax, y.max())
+
+        def frames():
+            for phis in self.angle_chunks(directory):
+                yield from zip(*self.coordinates(phis))
+
+        def update(frame):
+            line.set_data(*frame)
+            return line,
+
+        fig, ax = plt.subplots()
+        ax.set_xlim(xmin-1, xmax+1)
+        ax.set_ylim(ymin-1, ymax+1)
+        ax.set_aspect('equal')
+        line, = ax.plot([], [], 'b')
+        animation = FuncAnimation(fig, update, frames=frames, interval=interval,
+                                  blit=True, save_count=nframes,
+                                  cache_frame_data=False)
+        if filename is None:
+            plt.show()
+        else:
+            animation.save(filename)
+
+if __name__ == '__main__':
+    chain = Chain(200, 150, 0.003)
+    chain.solve_eq_of_motion(0, 40, 50)
+    chain.plot_dynamics()
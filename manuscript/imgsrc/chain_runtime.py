@@ -0,0 +1,40 @@
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from chain import Chain
+
+def solve_time(nlinks, jac, time_f=1, nt=5):
+    chain = Chain(nlinks, 3*nlinks//4, 0.003)
+    y0 = np.zeros(2*nlinks, dtype=np.float64)
+    y0[nlinks:] = chain.equilibrium()
+    start = time.perf_counter()
+    solve_ivp(chain.diff_fast, (0, time_f), y0, method='Radau',
+              t_eval=np.linspace(0, time_f, nt),
+              jac=chain.jac if jac else None)
+    return time.perf_counter()-start
+
+nvals = np.array([50, 100, 200, 500, 1000, 2000])
+t_jac = np.empty(len(nvals), dtype=np.float64)
+t_fd = np.full(len(nvals), np.nan)
+with open('chain_runtime.dat', 'w') as fh:
+    for nr, nlinks in enumerate(nvals):
+        t_jac[nr] = solve_time(nlinks, jac=True)
+        # the finite-difference Jacobian becomes prohibitively expensive
+        # for long chains
+        if nlinks <= 500:
+            t_fd[nr] = solve_time(nlinks, jac=False)
+        fh.write(f'{nlinks} {t_jac[nr]} {t_fd[nr]}\n')
+        print(nlinks, t_jac[nr], t_fd[nr])
+
+plt.rc('text', usetex=True)
+plt.xscale('log')
+plt.yscale('log')
+plt.xlabel('$n_\\mathrm{links}$', fontsize=20)
+plt.ylabel('$t/\\mathrm{s}$', fontsize=20)
+plt.plot(nvals, t_jac, 'o', label='analytic Jacobian')
+plt.plot(nvals, t_fd, 's', label='finite differences')
+plt.legend()
+plt.show()
@@ -0,0 +1,56 @@
+from concurrent import futures
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backends import attach_shared, shared
+from chain import Chain
+
+def _solve(nr, nlinks, length, damping, angles, time_i, time_f, nt):
+    chain = Chain(nlinks, length, damping)
+    chain.solve_eq_of_motion(time_i, time_f, nt, angles=angles)
+    y = chain.solution.y
+    shared('trajectories')[nr, :, :y.shape[1]] = y
+    return nr, chain.solution.status
+
+def equilibria(nlinks, lengths):
+    return {length: Chain(nlinks, length, 0).equilibrium()
+            for length in set(lengths)}
+
+def sweep(nlinks, configurations, time_i, time_f, nt, max_workers=4):
+    configurations = list(configurations)
+    angles = equilibria(nlinks, [length for length, _ in configurations])
+    shape = (len(configurations), 2*nlinks, nt)
+    shm = shared_memory.SharedMemory(create=True,
+                                     size=int(np.prod(shape))*8)
+    y = None
+    try:
+        y = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        y[...] = np.nan
+        with futures.ProcessPoolExecutor(max_workers=max_workers,
+                                         initializer=attach_shared,
+                                         initargs=('trajectories', shm.name,
+                                                   shape, np.float64)) as ex:
+            wait_for = [ex.submit(_solve, nr, nlinks, length, damping,
+                                  angles[length], time_i, time_f, nt)
+                        for nr, (length, damping) in enumerate(configurations)]
+            status = np.empty(len(configurations), dtype=int)
+            for f in futures.as_completed(wait_for):
+                nr, status[nr] = f.result()
+        result = y.copy()
+    finally:
+        del y
+        shm.close()
+        shm.unlink()
+    return np.linspace(time_i, time_f, nt), result, status
+
+if __name__ == '__main__':
+    from itertools import product
+    import time
+
+    nlinks = 50
+    lengths = np.linspace(30, 45, 4)
+    dampings = (0.001, 0.003, 0.01)
+    start = time.time()
+    t, y, status = sweep(nlinks, product(lengths, dampings), 0, 10, 20)
+    print(time.time()-start, status)
@@ -0,0 +1,219 @@
+"""hardware performance counters for individual kernel calls on Linux
+
+The counters are obtained from the perf_event_open system call via ctypes.
+Counters not supported by the processor, the kernel or a virtual machine
+are reported as None. For measurements of the user-space part of the
+process, /proc/sys/kernel/perf_event_paranoid must not exceed 2. Bytes
+transferred from main memory are taken from the uncore memory controller
+if it is accessible, which usually requires root privileges, and are
+otherwise estimated from the number of misses in the last level cache.
+
+"""
+import ctypes
+import fcntl
+import os
+import platform
+import struct
+import sys
+import time
+
+import numpy as np
+
+SYSCALL_PERF_EVENT_OPEN = {'x86_64': 298, 'aarch64': 241, 'ppc64le': 319}
+
+PERF_TYPE_HARDWARE = 0
+PERF_TYPE_SOFTWARE = 1
+PERF_TYPE_HW_CACHE = 3
+
+# name: (type, config)
+EVENTS = {'cycles': (PERF_TYPE_HARDWARE, 0),
+          'instructions': (PERF_TYPE_HARDWARE, 1),
+          'llc_references': (PERF_TYPE_HARDWARE, 2),
+          'llc_misses': (PERF_TYPE_HARDWARE, 3),
+          'llc_read_misses': (PERF_TYPE_HW_CACHE, 2 | 0 << 8 | 1 << 16),
+          'task_clock': (PERF_TYPE_SOFTWARE, 1),
+          'page_faults': (PERF_TYPE_SOFTWARE, 2)}
+
+CACHE_LINE = 64
+
+_PERF_EVENT_IOC_ENABLE = 0x2400
+_PERF_EVENT_IOC_DISABLE = 0x2401
+_PERF_EVENT_IOC_RESET = 0x2403
+_PERF_FORMAT_TOTAL_TIME_ENABLED = 1
+_PERF_FORMAT_TOTAL_TIME_RUNNING = 2
+# bits of the flags field: disabled, inherit, exclude_kernel, exclude_hv
+_FLAGS = 1 << 0 | 1 << 1 | 1 << 5 | 1 << 6
+
+_libc = ctypes.CDLL(None, use_errno=True)
+
+def perf_event_open(type_, config, pid=0, cpu=-1, flags=_FLAGS):
+    """open a counter and return its file descriptor
+
+       An OSError is raised if the event is not available.
+
+    """
+    nr = SYSCALL_PERF_EVENT_OPEN.get(platform.machine())
+    if nr is None:
+        raise OSError(f'perf_event_open unknown on {platform.machine()}')
+    # struct perf_event_attr up to config2 (PERF_ATTR_SIZE_VER1)
+    read_format = (_PERF_FORMAT_TOTAL_TIME_ENABLED
+                   | _PERF_FORMAT_TOTAL_TIME_RUNNING)
+    attr = ctypes.create_string_buffer(struct.pack(
+        'IIQQQQQIIQQ', type_, 72, config, 0, 0, read_format, flags,
+        0, 0, 0, 0), 72)
+    fd = _libc.syscall(ctypes.c_long(nr), attr, ctypes.c_long(pid),
+                       ctypes.c_long(cpu), ctypes.c_long(-1), ctypes.c_long(0))
+    if fd < 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
+    return fd
+
+def _uncore_imc():
+    # events counting read and write accesses of the memory controllers
+    events = []
+    directory = '/sys/bus/event_source/devices'
+    try:
+        devices = sorted(d for d in os.listdir(directory)
+                         if d.startswith('uncore_imc'))
+    except OSError:
+        return events
+    for device in devices:
+        with open(os.path.join(directory, device, 'type')) as fh:
+            type_ = int(fh.read())
+        for name in ('cas_count_read', 'cas_count_write'):
+            try:
+                with open(os.path.join(directory, device, 'events',
+                                       name)) as fh:
+                    spec = dict(item.split('=')
+                                for item in fh.read().strip().split(','))
+            except OSError:
+                continue
+            config = int(spec.get('event', '0'), 16) | int(
+                spec.get('umask', '0'), 16) << 8
+            events.append((type_, config))
+    return events
+
+class Counters:
+    """context manager counting events during the execution of its body
+
+       After leaving the context, the attribute values contains the
+       counts for all requested events, None for unavailable ones, as
+       well as the elapsed time and the bytes from main memory.
+
+    """
+    def __init__(self, events=tuple(EVENTS)):
+        self.fds = {}
+        for name in events:
+            try:
+                self.fds[name] = perf_event_open(*EVENTS[name])
+            except OSError:
+                self.fds[name] = None
+        # the memory controllers are counted for the whole system on CPU 0
+        self.imc_fds = []
+        for type_, config in _uncore_imc():
+            try:
+                self.imc_fds.append(perf_event_open(type_, config, pid=-1,
+                                                    cpu=0, flags=1))
+            except OSError:
+                pass
+        self.values = {}
+
+    def _all_fds(self):
+        return [fd for fd in self.fds.values() if fd is not None]+self.imc_fds
+
+    def close(self):
+        for fd in self._all_fds():
+            os.close(fd)
+        self.fds = {}
+        self.imc_fds = []
+
+    def __enter__(self):
+        for fd in self._all_fds():
+            fcntl.ioctl(fd, _PERF_EVENT_IOC_RESET, 0)
+            fcntl.ioctl(fd, _PERF_EVENT_IOC_ENABLE, 0)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter()-self._start
+        for fd in self._all_fds():
+            fcntl.ioctl(fd, _PERF_EVENT_IOC_DISABLE, 0)
+        self.values = {name: None if fd is None else self._read(fd)
+                       for name, fd in self.fds.items()}
+        self.values['time'] = elapsed
+        if self.imc_fds:
+            self.values['dram_bytes'] = CACHE_LINE*sum(
+                self._read(fd) for fd in self.imc_fds)
+        elif self.values.get('llc_misses') is not None:
+            self.values['dram_bytes'] = CACHE_LINE*self.values['llc_misses']
+        else:
+            self.values['dram_bytes'] = None
+        return False
+
+    @staticmethod
+    def _read(fd):
+        # counts are extrapolated if the counter had to share the hardware
+        value, enabled, running = struct.unpack('QQQ', os.read(fd, 24))
+        return round(value*enabled/running) if running else 0
+
+def measure(function, *args, repeat=5, events=tuple(EVENTS)):
+    """counts for repeat calls of function(*args) after one warm-up call"""
+    function(*args)
+    counters = Counters(events)
+    results = []
+    try:
+        for _ in range(repeat):
+            with counters:
+                function(*args)
+            results.append(counters.values)
+    finally:
+        counters.close()
+    return results
+
+def summary(results):
+    # medians over the calls and derived quantities
+    keys = [key for key in results[0] if results[0][key] is not None]
+    values = {key: float(np.median([r[key] for r in results]))
+              for key in keys}
+    if 'cycles' in values and 'instructions' in values and values['cycles']:
+        values['ipc'] = values['instructions']/values['cycles']
+    if 'dram_bytes' in values:
+        values['bandwidth'] = values['dram_bytes']/values['time']
+    return values
+
+def traversal(a, axis):
+    # sums over rows (axis=1) or columns (axis=0) of a C-ordered array,
+    # one slice at a time
+    if axis == 1:
+        return [a[i, :].sum() for i in range(a.shape[0])]
+    return [a[:, j].sum() for j in range(a.shape[1])]
+
+def kernels():
+    from jacobi import initial_grid, jacobi_step
+    from mandelbrot_pool import mandelbrot_tile, tiles
+
+    small = initial_grid(200)
+    large = initial_grid(4000)
+    nx, ny, cx, cy = tiles(-2, 1, -1.5, 1.5, 256, 1)[0]
+    a = np.random.default_rng(0).random((4000, 4000))
+    return {'jacobi_step 200x200': (jacobi_step, small),
+            'jacobi_step 4000x4000': (jacobi_step, large),
+            'mandelbrot_tile 256x256': (mandelbrot_tile, 500, nx, ny, cx, cy),
+            'row-major traversal': (traversal, a, 1),
+            'column-major traversal': (traversal, a, 0)}
+
+def report(name, values):
+    def fmt(key, scale=1):
+        value = values.get(key)
+        return f'{"n/a":>10s}' if value is None else f'{value/scale:10.3g}'
+
+    print(f'{name:26s} {fmt("time", 1e-3)} {fmt("cycles")}'
+          f' {fmt("instructions")} {fmt("ipc")} {fmt("llc_misses")}'
+          f' {fmt("bandwidth", 1e9)} {fmt("page_faults")}')
+
+if __name__ == '__main__':
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f'{"kernel":26s} {"time (ms)":>10s} {"cycles":>10s} {"instr.":>10s}'
+          f' {"IPC":>10s} {"LLC miss":>10s} {"GB/s":>10s} {"faults":>10s}')
+    for name, (function, *args) in kernels().items():
+        report(name, summary(measure(function, *args, repeat=repeat)))
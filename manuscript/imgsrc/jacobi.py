@@ -0,0 +1,27 @@
+import numpy as np
+
+def jacobi_step(u):
+    u_old = u.copy()
+    u[1:-1, 1:-1] = 0.25*(u[0:-2, 1:-1] + u[2:, 1:-1]
+                          + u[1:-1,0:-2] + u[1:-1, 2:])
+    v = (u-u_old).flat
+    return u, np.dot(v,v)
+
+def initial_grid(num_points):
+    # boundary conditions of the Laplace example in the presentation
+    m = np.zeros((num_points, num_points), dtype=float)
+    m[0, :] = 1
+    m[:, 0] = 1
+    m[-1, :] = -1
+    m[:, -1] = -1
+    return m
+
+def laplace(num_points, max_iter=5000, tolerance=1e-7):
+    # serial version of the MPI example
+    u = initial_grid(num_points)
+    err = 1
+    num_iter = 0
+    while num_iter < max_iter and err > tolerance:
+        u, err = jacobi_step(u)
+        num_iter = num_iter+1
+    return u, num_iter
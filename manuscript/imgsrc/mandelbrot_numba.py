@@ -0,0 +1,39 @@
+from numba import complex128, guvectorize, int64, njit
+import matplotlib.pyplot as plt
+import numpy as np
+
+@njit(int64(complex128, int64), cache=True)
+def mandelbrot_iteration(c, maxiter):
+    z = 0
+    for n in range(maxiter):
+        z = z**2+c
+        if z.real*z.real+z.imag*z.imag > 4:
+            return n
+    return maxiter
+
+@guvectorize([(complex128[:], int64[:], int64[:])], '(n), () -> (n)',
+             target='parallel', cache=True)
+def mandelbrot(c, itermax, output):
+    nitermax = itermax[0]
+    for i in range(c.shape[0]):
+        output[i] = mandelbrot_iteration(c[i], nitermax)
+
+def mandelbrot_set(xmin, xmax, ymin, ymax, npts, nitermax):
+    cy, cx = np.ogrid[ymin:ymax:npts*1j, xmin:xmax:npts*1j]
+    c = cx+cy*1j
+    return mandelbrot(c, nitermax)
+
+def plot(data, xmin, xmax, ymin, ymax):
+    plt.imshow(data, extent=(xmin, xmax, ymin, ymax),
+               cmap='jet', origin='lower', interpolation='none')
+    plt.show()
+
+if __name__ == '__main__':
+    nitermax = 2000
+    npts = 1024
+    xmin = -2
+    xmax = 1
+    ymin = -1.5
+    ymax = 1.5
+    data = mandelbrot_set(xmin, xmax, ymin, ymax, npts, nitermax)
+    plot(data, xmin, xmax, ymin, ymax)
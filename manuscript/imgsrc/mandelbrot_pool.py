@@ -0,0 +1,73 @@
+from concurrent import futures
+from itertools import product
+from functools import partial
+
+import numpy as np
+
+from backends import default_backend, executor
+
+def mandelbrot_tile(nitermax, nx, ny, cx, cy, out=None):
+    # if out is given, the tile is written directly into it
+    x = np.zeros_like(cx)
+    y = np.zeros_like(cx)
+    if out is None:
+        data = np.zeros(cx.shape, dtype=int)
+    else:
+        data = out
+        data[...] = 0
+    for n in range(nitermax):
+        x2 = x*x
+        y2 = y*y
+        notdone = x2+y2 < 4
+        data[notdone] = n
+        x[notdone], y[notdone] = (x2[notdone]-y2[notdone]+cx[notdone],
+                                  2*x[notdone]*y[notdone]+cy[notdone])
+    return (nx, ny, data)
+
+def tiles(xmin, xmax, ymin, ymax, npts, ndiv):
+    # parameters of the ndiv*ndiv tasks as in the chapter on parallel computing
+    cy, cx = np.mgrid[ymin:ymax:npts*1j, xmin:xmax:npts*1j]
+    nlen = npts//ndiv
+    return [(nx, ny,
+             cx[nx*nlen:(nx+1)*nlen, ny*nlen:(ny+1)*nlen],
+             cy[nx*nlen:(nx+1)*nlen, ny*nlen:(ny+1)*nlen])
+            for nx, ny in product(range(ndiv), repeat=2)]
+
+def mandelbrot(xmin, xmax, ymin, ymax, npts, nitermax, ndiv, max_workers=4,
+               backend=None):
+    """determine the Mandelbrot set in ndiv*ndiv tiles
+
+       With the backend 'process', the tiles are returned by the
+       worker processes and then copied into the result. With the
+       backend 'thread', the workers write into the result array
+       directly, which pays off on a free-threaded Python build. By
+       default, threads are used if the GIL is disabled.
+
+    """
+    backend = backend or default_backend()
+    paramlist = tiles(xmin, xmax, ymin, ymax, npts, ndiv)
+    nlen = npts//ndiv
+    data = np.zeros((npts, npts), dtype=int)
+    with executor(backend, max_workers) as executors:
+        if backend == 'thread':
+            wait_for = [executors.submit(
+                            partial(mandelbrot_tile, nitermax), nx, ny, cx, cy,
+                            out=data[nx*nlen:(nx+1)*nlen, ny*nlen:(ny+1)*nlen])
+                        for (nx, ny, cx, cy) in paramlist]
+            for f in futures.as_completed(wait_for):
+                f.result()
+            return data
+        wait_for = [executors.submit(partial(mandelbrot_tile, nitermax),
+                                     nx, ny, cx, cy)
+                    for (nx, ny, cx, cy) in paramlist]
+        results = [f.result() for f in futures.as_completed(wait_for)]
+    for nx, ny, result in results:
+        data[nx*nlen:(nx+1)*nlen, ny*nlen:(ny+1)*nlen] = result
+    return data
+
+if __name__ == '__main__':
+    import time
+
+    start = time.time()
+    mandelbrot(-2, 1, -1.5, 1.5, 1024, 2000, 8)
+    print(f'execution time: {time.time()-start:5.2f}s')
@@ -0,0 +1,233 @@
+"""memory consumption of scripts and kernels per source line
+
+usage: python memprofile.py [-n TOP] script.py [args]
+       python memprofile.py [-n TOP] --kernel {mandelbrot,carpet,chain}
+
+All allocations, including the data buffers of NumPy arrays which NumPy
+reports to tracemalloc, are followed while the lines of the script or
+kernel are executed. For each line, the number of executions, the largest
+and the total amount of memory temporarily needed beyond the memory in use
+when the line started, and the net change are reported. Statements
+extending over several lines are attributed to their first line. The peak
+resident set size of the process is given for the sizing of jobs.
+
+Only the main thread is traced. Memory allocated by other threads is
+attributed to the line executed by the main thread in the meantime.
+
+"""
+import argparse
+import ast
+from collections import defaultdict
+import os
+import resource
+import sys
+import tokenize
+import tracemalloc
+
+import numpy as np
+
+def statement_lines(filename):
+    """map the line numbers of a source file to the first line of the
+       statement they belong to
+
+       For compound statements like loops, only the lines of the header
+       are mapped to the first line.
+
+    """
+    try:
+        with tokenize.open(filename) as fh:
+            tree = ast.parse(fh.read(), filename)
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        return {}
+    lines = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.stmt):
+            continue
+        body = getattr(node, 'body', None)
+        if isinstance(body, list) and body:
+            end = body[0].lineno-1
+        else:
+            end = node.end_lineno
+        for lineno in range(node.lineno, end+1):
+            lines[lineno] = node.lineno
+    return lines
+
+class LineMemoryTracer:
+    """record the memory needed by each line of the given source files
+
+       The statistics are kept in a dictionary mapping (filename,
+       lineno) to [executions, maximal temporary memory, total
+       temporary memory, net change]. Memory allocated by a called
+       function which is traced itself is attributed to the lines of
+       that function. Consecutive line events within one statement
+       count as a single execution.
+
+    """
+    def __init__(self, filenames):
+        self.filenames = {os.path.abspath(f) for f in filenames}
+        self.stats = defaultdict(lambda: [0, 0, 0, 0])
+        self._statements = {}
+        self._stack = []
+        self._start = 0
+        self.peak = 0
+
+    def _statement(self, frame):
+        filename = frame.f_code.co_filename
+        if filename not in self._statements:
+            self._statements[filename] = statement_lines(filename)
+        lineno = frame.f_lineno
+        return filename, self._statements[filename].get(lineno, lineno)
+
+    def _close_segment(self):
+        # account for the memory used since the current line became active,
+        # before the first line of a frame is reached, the key is None
+        if self._stack:
+            current, peak = tracemalloc.get_traced_memory()
+            self.peak = max(self.peak, peak)
+            if self._stack[-1] is None:
+                return
+            stats = self.stats[self._stack[-1]]
+            temporary = peak-self._start
+            stats[1] = max(stats[1], temporary)
+            stats[2] += temporary
+            stats[3] += current-self._start
+
+    def _open_segment(self):
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+    def _global_trace(self, frame, event, arg):
+        if os.path.abspath(frame.f_code.co_filename) not in self.filenames:
+            return None
+        self._close_segment()
+        self._stack.append(None)
+        self._open_segment()
+        return self._local_trace
+
+    def _local_trace(self, frame, event, arg):
+        if event == 'line':
+            key = self._statement(frame)
+            if key != self._stack[-1]:
+                self._close_segment()
+                self._stack[-1] = key
+                self.stats[key][0] += 1
+                self._open_segment()
+        elif event == 'return':
+            self._close_segment()
+            self._stack.pop()
+            self._open_segment()
+        return self._local_trace
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._open_segment()
+        sys.settrace(self._global_trace)
+
+    def stop(self):
+        sys.settrace(None)
+
+    def report(self, top=20, file=sys.stdout):
+        lines = {}
+        print(f'{"line":40s} {"hits":>8s} {"max temp":>10s}'
+              f' {"temp/hit":>10s} {"net":>10s}', file=file)
+        ranking = sorted(self.stats.items(), key=lambda item: -item[1][1])
+        for (filename, lineno), (hits, maximum, total, net) in ranking[:top]:
+            location = f'{os.path.basename(filename)}:{lineno}'
+            if filename not in lines:
+                try:
+                    with open(filename) as fh:
+                        lines[filename] = fh.readlines()
+                except OSError:
+                    lines[filename] = []
+            source = (lines[filename][lineno-1].strip()
+                      if 0 < lineno <= len(lines[filename]) else '')
+            print(f'{location:40s} {hits:8d} {_size(maximum)}'
+                  f' {_size(total/max(hits, 1))} {_size(net)}  {source[:50]}',
+                  file=file)
+
+def _size(nbytes):
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if abs(nbytes) < 1024 or unit == 'GB':
+            return f'{nbytes:8.1f}{unit:>2s}'
+        nbytes = nbytes/1024
+
+def peak_rss():
+    # in bytes, ru_maxrss is given in kilobytes on Linux
+    return 1024*resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def numpy_memory():
+    # memory of the data buffers of NumPy arrays currently alive
+    snapshot = tracemalloc.take_snapshot().filter_traces(
+        [tracemalloc.DomainFilter(True, np.lib.tracemalloc_domain)])
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+def _mandelbrot():
+    from mandelbrot_pool import mandelbrot_tile, tiles
+
+    nx, ny, cx, cy = tiles(-2, 1, -1.5, 1.5, 512, 1)[0]
+    return mandelbrot_tile, (100, nx, ny, cx, cy)
+
+def _carpet():
+    from carpet import InfiniteWell, psi0
+
+    w = InfiniteWell(psi0=psi0, width=2, nbase=100, nint=1000)
+    x = np.linspace(-0.5*w.width, 0.5*w.width, 500)
+    t = np.linspace(0, np.pi/4, 1000)
+    return w.psi, (x, t)
+
+def _chain():
+    from chain import Chain
+
+    # the right-hand side used by the integrator
+    chain = Chain(500, 1, 0.1)
+    y = np.linspace(0, 1, 2*chain.nlinks)
+    return chain.diff_fast, (0, y)
+
+KERNELS = {'mandelbrot': _mandelbrot, 'carpet': _carpet, 'chain': _chain}
+
+def profile_kernel(name):
+    function, args = KERNELS[name]()
+    module = sys.modules[function.__module__]
+    tracer = LineMemoryTracer([module.__file__])
+    tracemalloc.start()
+    tracer.start()
+    try:
+        function(*args)
+    finally:
+        tracer.stop()
+    return tracer
+
+def profile_script(path, args):
+    from sampler import run_script
+
+    tracer = LineMemoryTracer([path])
+    tracemalloc.start()
+    tracer.start()
+    try:
+        run_script(path, args)
+    finally:
+        tracer.stop()
+    return tracer
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('-n', '--top', type=int, default=20,
+                        help='number of lines reported')
+    parser.add_argument('--kernel', choices=KERNELS)
+    parser.add_argument('script', nargs='?')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+    if (args.kernel is None) == (args.script is None):
+        parser.error('either a script or a kernel is required')
+
+    if args.kernel is not None:
+        tracer = profile_kernel(args.kernel)
+    else:
+        tracer = profile_script(args.script, args.args)
+    print(f'peak resident set size:      {_size(peak_rss())}')
+    print(f'peak traced memory:          {_size(tracer.peak)}')
+    print(f'NumPy arrays alive at exit:  {_size(numpy_memory())}')
+    tracemalloc.stop()
+    tracer.report(args.top)
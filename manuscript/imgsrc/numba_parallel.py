@@ -1,11 +1,16 @@
+import sys
+
 from pyx import color, deco, graph, style
 
-with open('numba_parallel.dat') as fh:
-    t_cpu = float(fh.readline().rstrip('\n').split()[1])
-    t_parallel = [(1, t_cpu)]
-    for _ in range(7):
-        elems = fh.readline().rstrip('\n').split()
+filename = sys.argv[1] if len(sys.argv) > 1 else 'numba_parallel.dat'
+with open(filename) as fh:
+    t_parallel = []
+    for line in fh:
+        if line.startswith('#'):
+            continue
+        elems = line.rstrip('\n').split()
         t_parallel.append((int(elems[0]), float(elems[1])))
+t_cpu = t_parallel[0][1]
 t_parallel = [(n, t_cpu/t) for n, t in t_parallel]
 
 g = graph.graphxy(width=8,
@@ -1,12 +1,16 @@
+import sys
+
 from pyx import color, deco, graph, style
 
-cpus = ['i7-6700hq',]
+cpus = ['i7-6700hq']+sys.argv[1:]
 data = {}
 for cpu in cpus:
     data[cpu] = []
     with open(cpu+'.dat') as fh:
         for line in fh:
-            nr, t4, t1 = line.rstrip('\n').split()
+            if line.startswith('#'):
+                continue
+            nr, t4, t1 = line.rstrip('\n').split()[:3]
             nr = int(nr)
             t1 = float(t1)
             t4 = float(t4)
@@ -0,0 +1,189 @@
+from functools import lru_cache
+import math
+
+import numpy as np
+from scipy.special import gammaln
+
+from sieve import sieve
+
+# largest line number for which all entries fit into an unsigned 64 bit integer
+UINT64_MAX_LINE = 67
+ROW_CACHE_SIZE = 32
+# moduli up to this value are treated with factorial tables, larger ones
+# have to exceed the line number
+LUCAS_PRIME_MAX = 2**20
+
+def pascal(n):
+    """create the n-th line of Pascal's triangle
+
+    The line numbers start with n=0 for the line
+    containing only the entry 1. The elements of
+    a line are generated successively.
+
+    """
+    if n < 0:
+        raise ValueError('line number must not be negative')
+    x = 1
+    yield x
+    for k in range(n):
+        x = x*(n-k)//(k+1)
+        yield x
+
+def next_row(row):
+    """create the next line of Pascal's triangle from the given one
+
+    The entries are obtained by adding neighboring elements
+    of the given line. Once the entries cannot be represented
+    by unsigned 64 bit integers anymore, Python integers are
+    used instead.
+
+    """
+    n = len(row)
+    dtype = np.uint64 if n <= UINT64_MAX_LINE else object
+    new = np.empty(n+1, dtype=dtype)
+    new[0] = 1
+    new[n] = 1
+    row = row.astype(dtype, copy=False)
+    new[1:n] = row[:-1]+row[1:]
+    return new
+
+def pascal_rows(n):
+    """generate the lines 0 to n of Pascal's triangle as arrays"""
+    if n < 0:
+        raise ValueError('line number must not be negative')
+    row = np.ones(1, dtype=np.uint64)
+    yield row
+    for _ in range(n):
+        row = next_row(row)
+        yield row
+
+_rows = {}
+
+def pascal_row(n):
+    """return the n-th line of Pascal's triangle as read-only array
+
+    Recently used lines are cached. If the previous line is
+    available in the cache, the line is obtained from it by
+    the additive rule.
+
+    """
+    if n in _rows:
+        # reinserting the line moves it to the end of the dictionary, so
+        # that the least recently used line comes first and is evicted
+        row = _rows[n] = _rows.pop(n)
+        return row
+    if n < 0:
+        raise ValueError('line number must not be negative')
+    if n-1 in _rows:
+        row = next_row(_rows[n-1])
+    else:
+        dtype = np.uint64 if n <= UINT64_MAX_LINE else object
+        row = np.fromiter(pascal(n), dtype=dtype, count=n+1)
+    row.flags.writeable = False
+    if len(_rows) >= ROW_CACHE_SIZE:
+        del _rows[next(iter(_rows))]
+    _rows[n] = row
+    return row
+
+@lru_cache(maxsize=4)
+def factorial_tables(p):
+    """return k! and its inverse modulo the prime p for k=0, ..., p-1"""
+    fact = [1]*p
+    for k in range(1, p):
+        fact[k] = fact[k-1]*k % p
+    inv_fact = [1]*p
+    inv_fact[p-1] = pow(fact[p-1], -1, p)
+    for k in range(p-1, 1, -1):
+        inv_fact[k-1] = inv_fact[k]*k % p
+    fact = np.array(fact, dtype=np.int64)
+    inv_fact = np.array(inv_fact, dtype=np.int64)
+    fact.flags.writeable = False
+    inv_fact.flags.writeable = False
+    return fact, inv_fact
+
+def _lucas(n, k, p):
+    # by Lucas' theorem, the binomial coefficient modulo p is the product of
+    # the binomial coefficients of the digits of n and k in base p
+    fact, inv_fact = factorial_tables(p)
+    result = np.ones(len(k), dtype=np.int64)
+    while n > 0:
+        ni = n % p
+        ki = k % p
+        valid = ki <= ni
+        term = fact[ni]*inv_fact[ki] % p*inv_fact[np.where(valid, ni-ki, 0)] % p
+        result = np.where(valid, result*term % p, 0)
+        n = n//p
+        k = k//p
+    return result
+
+def _modular_chunks(n, bounds, p):
+    if p <= LUCAS_PRIME_MAX:
+        for start, stop in bounds:
+            yield _lucas(n, np.arange(start, stop, dtype=np.int64), p)
+        return
+    if n >= p:
+        raise ValueError(f'line number must be smaller than p={p}')
+    # for p > n, all factorials are invertible modulo p
+    num = 1
+    den = 1
+    for k in range(bounds[0][0]):
+        num = num*(n-k) % p
+        den = den*(k+1) % p
+    x = num*pow(den, -1, p) % p
+    for start, stop in bounds:
+        chunk = np.empty(stop-start, dtype=np.int64)
+        for k in range(start, stop):
+            chunk[k-start] = x
+            x = x*(n-k) % p*pow(k+1, -1, p) % p
+        yield chunk
+
+def _exact_chunks(n, bounds):
+    x = math.comb(n, bounds[0][0])
+    for start, stop in bounds:
+        chunk = np.empty(stop-start, dtype=object)
+        for k in range(start, stop):
+            chunk[k-start] = x
+            x = x*(n-k)//(k+1)
+        yield chunk
+
+def pascal_chunks(n, start=0, stop=None, chunksize=1024, mode='exact', p=None):
+    """generate the entries k=start, ..., stop-1 of the n-th line in chunks
+
+    The entries are returned as arrays of at most chunksize
+    elements so that the memory required does not depend on
+    the line number. The mode determines what is returned:
+
+    'exact': the binomial coefficients as Python integers
+    'mod':   the binomial coefficients modulo the prime p
+    'log':   the natural logarithm of the binomial coefficients
+
+    In the exact mode, the coefficient at start is obtained
+    directly without generating the entries before it.
+
+    """
+    if n < 0:
+        raise ValueError('line number must not be negative')
+    if stop is None:
+        stop = n+1
+    if not 0 <= start <= stop <= n+1:
+        raise ValueError('entries must satisfy 0 <= start <= stop <= n+1')
+    bounds = [(k, min(k+chunksize, stop)) for k in range(start, stop, chunksize)]
+    if not bounds:
+        return
+    if mode == 'exact':
+        yield from _exact_chunks(n, bounds)
+    elif mode == 'log':
+        for start, stop in bounds:
+            k = np.arange(start, stop, dtype=np.float64)
+            yield gammaln(n+1)-gammaln(k+1)-gammaln(n-k+1)
+    elif mode == 'mod':
+        if p is None or p < 2 or np.any(p % sieve(math.isqrt(p)) == 0):
+            raise ValueError('the modulus p has to be a prime number')
+        yield from _modular_chunks(n, bounds, p)
+    else:
+        raise ValueError(f'unknown mode {mode!r}')
+
+if __name__ == '__main__':
+    for n in range(7):
+        line = ' '.join(f'{x:2}' for x in pascal(n))
+        print(str(n)+line.center(25))
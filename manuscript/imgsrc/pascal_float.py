@@ -0,0 +1,82 @@
+import numpy as np
+
+def taylor_power(power):
+    """generate the Taylor coefficients of (1+x)**power
+
+       This function is based on the function pascal().
+
+    """
+    coeff = 1
+    yield coeff
+    k = 0
+    while power-k != 0:
+        coeff = coeff*(power-k)/(k+1)
+        k = k+1
+        yield coeff
+
+def taylor_coefficients(powers, ncoeffs):
+    """return the first ncoeffs Taylor coefficients of (1+x)**power
+
+       The coefficients for all elements of the array powers are
+       obtained at once as cumulative products of the ratios of
+       subsequent coefficients. They are stored along the last
+       axis of the result.
+
+    """
+    powers = np.asarray(powers)
+    dtype = np.result_type(powers, np.float64)
+    k = np.arange(ncoeffs-1)
+    ratios = (powers[..., np.newaxis]-k)/(k+1)
+    coeffs = np.ones(powers.shape+(ncoeffs,), dtype=dtype)
+    np.cumprod(ratios, axis=-1, out=coeffs[..., 1:])
+    return coeffs
+
+def horner(coeffs, x):
+    """evaluate power series with coefficients along the last axis at x
+
+       The result has the shape of coeffs without its last axis
+       followed by the shape of x.
+
+    """
+    x = np.asarray(x)
+    coeffs = coeffs.reshape(coeffs.shape[:-1]+(1,)*x.ndim+coeffs.shape[-1:])
+    result = coeffs[..., -1]*np.ones_like(x)
+    for k in range(coeffs.shape[-1]-2, -1, -1):
+        result = result*x+coeffs[..., k]
+    return result
+
+def series_product(coeffs1, coeffs2):
+    """multiply truncated power series with coefficients along the last axis"""
+    coeffs1, coeffs2 = np.broadcast_arrays(coeffs1, coeffs2)
+    ncoeffs = coeffs1.shape[-1]
+    result = np.zeros(coeffs1.shape, dtype=np.result_type(coeffs1, coeffs2))
+    for j in range(ncoeffs):
+        result[..., j:] += coeffs1[..., j:j+1]*coeffs2[..., :ncoeffs-j]
+    return result
+
+def taylor_series(powers, x, ncoeffs):
+    """evaluate the Taylor series of (1+x)**power truncated after ncoeffs terms
+
+       Returns the values and an upper bound for the absolute error
+       for all combinations of the elements of powers and x. The
+       bound is infinite where it cannot be guaranteed, in
+       particular for abs(x) >= 1.
+
+    """
+    powers = np.asarray(powers)
+    x = np.asarray(x)
+    coeffs = taylor_coefficients(powers, ncoeffs+1)
+    values = horner(coeffs[..., :-1], x)
+    # the ratio of subsequent coefficients beyond the last one retained
+    # is bounded by max(1, |power-n|/(n+1))
+    shape = powers.shape+(1,)*x.ndim
+    q = np.maximum(1, np.abs(powers-ncoeffs)/(ncoeffs+1)).reshape(shape)*np.abs(x)
+    first = np.abs(coeffs[..., -1]).reshape(shape)*np.abs(x)**ncoeffs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bound = np.where(q < 1, first/(1-np.minimum(q, 1)), np.inf)
+    bound = np.where(first == 0, 0, bound)
+    return values, bound
+
+if __name__ == '__main__':
+    for n, val in zip(range(5), taylor_power(1/3)):
+        print(n, val)
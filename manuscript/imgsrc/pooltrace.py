@@ -0,0 +1,239 @@
+"""record the timeline of tasks submitted to a concurrent.futures executor
+
+Example::
+
+    with TracingExecutor(futures.ProcessPoolExecutor(max_workers=4)) as ex:
+        wait_for = [ex.submit(f, x) for x in xvals]
+        results = [f.result() for f in futures.as_completed(wait_for)]
+    ex.chrome_trace('trace.json')
+
+The file trace.json can be loaded into chrome://tracing or Perfetto.
+
+"""
+from collections import namedtuple
+from concurrent import futures
+import json
+import os
+import pickle
+import threading
+import time
+
+from pyx import color, deco, path
+
+# times are taken from time.monotonic which on Linux refers to the same
+# clock in all processes of a machine
+TaskEvent = namedtuple('TaskEvent', ['task', 'name', 'pid', 'thread',
+                                     'submit', 'start', 'end', 'received',
+                                     'args_size', 'result_size'])
+
+def _traced(function, args, kwargs, pickled):
+    # executed by the worker. If pickled is true, the task arrives as
+    # pickled bytes in args and the result is pickled here, so that the
+    # sizes are obtained from the only serialization which takes place,
+    # passing bytes on costs the executor no more than a copy
+    if pickled:
+        function, args, kwargs = pickle.loads(args)
+    start = time.monotonic()
+    result = function(*args, **kwargs)
+    end = time.monotonic()
+    result_size = -1
+    if pickled:
+        result = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        result_size = len(result)
+    return (result, os.getpid(), threading.get_ident(), start, end,
+            result_size)
+
+def _name(function):
+    while hasattr(function, 'func'):
+        function = function.func
+    return getattr(function, '__name__', repr(function))
+
+class TracingExecutor:
+    """wrapper around a ProcessPoolExecutor or ThreadPoolExecutor
+
+       The futures returned by submit behave like those of the wrapped
+       executor. For each task, a TaskEvent is appended to the list
+       events once its result has been received. For a process pool,
+       the sizes of the pickled arguments and results are recorded
+       unless measure_sizes is false. Threads share their data, so
+       that no sizes are given for a thread pool.
+
+    """
+    def __init__(self, executor, measure_sizes=True):
+        self.executor = executor
+        self.measure_sizes = (measure_sizes and
+                              isinstance(executor, futures.ProcessPoolExecutor))
+        self.events = []
+        self._lock = threading.Lock()
+        self._ntasks = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown(wait=True)
+        return False
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def submit(self, function, *args, **kwargs):
+        with self._lock:
+            task = self._ntasks
+            self._ntasks = self._ntasks+1
+        submit = time.monotonic()
+        pickled = self.measure_sizes
+        args_size = -1
+        if pickled:
+            try:
+                payload = pickle.dumps((function, args, kwargs),
+                                       protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError):
+                # leave it to the executor to report the error
+                pickled = False
+            else:
+                args_size = len(payload)
+        if pickled:
+            inner = self.executor.submit(_traced, None, payload, None, True)
+        else:
+            inner = self.executor.submit(_traced, function, args, kwargs,
+                                         False)
+        # the outer future stays pending until the result is received, so
+        # that cancelling it cancels the task if it has not started yet
+        outer = futures.Future()
+
+        def cancelled(outer):
+            # Future.cancel does not wake up as_completed and wait, this
+            # is done by set_running_or_notify_cancel
+            if outer.cancelled():
+                inner.cancel()
+                outer.set_running_or_notify_cancel()
+
+        outer.add_done_callback(cancelled)
+
+        def settle(method, value):
+            # the outer future may have been cancelled in the meantime
+            try:
+                method(value)
+            except futures.InvalidStateError:
+                pass
+
+        def done(inner):
+            received = time.monotonic()
+            if inner.cancelled() or outer.cancelled():
+                outer.cancel()
+                return
+            exception = inner.exception()
+            if exception is not None:
+                settle(outer.set_exception, exception)
+                return
+            result, pid, thread, start, end, result_size = inner.result()
+            if pickled:
+                try:
+                    result = pickle.loads(result)
+                except Exception as exception:
+                    settle(outer.set_exception, exception)
+                    return
+            with self._lock:
+                self.events.append(TaskEvent(
+                    task, _name(function), pid, thread, submit, start, end,
+                    received, args_size, result_size))
+            settle(outer.set_result, result)
+
+        inner.add_done_callback(done)
+        return outer
+
+    def map(self, function, *iterables):
+        # as for Executor.map, all tasks are submitted immediately
+        wait_for = [self.submit(function, *args) for args in zip(*iterables)]
+
+        def results():
+            try:
+                for future in wait_for:
+                    yield future.result()
+            finally:
+                for future in wait_for:
+                    future.cancel()
+
+        return results()
+
+    def workers(self):
+        # consecutive numbers for the workers in the order of their first task
+        workers = {}
+        for event in sorted(self.events, key=lambda e: e.start):
+            workers.setdefault((event.pid, event.thread), len(workers))
+        return workers
+
+    def chrome_trace(self, filename):
+        """write the events in the Chrome trace event format
+
+           Each worker appears as a thread showing the execution of the
+           tasks. The waiting time between submission and start as well
+           as the time between the end of a task and the arrival of its
+           result are shown on the process of the submitting program.
+
+        """
+        t0 = min(event.submit for event in self.events)
+        workers = self.workers()
+        trace = []
+        for (pid, thread), nr in workers.items():
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                          'tid': thread, 'args': {'name': f'worker {nr}'}})
+        for event in self.events:
+            trace.append({'name': 'thread_name', 'ph': 'M',
+                          'pid': os.getpid(), 'tid': event.task,
+                          'args': {'name': f'task {event.task}'}})
+            sizes = {'task': event.task, 'args_size': event.args_size,
+                     'result_size': event.result_size}
+            for name, begin, end, pid, tid in (
+                    (event.name, event.start, event.end,
+                     event.pid, event.thread),
+                    ('queued', event.submit, event.start,
+                     os.getpid(), event.task),
+                    ('returned', event.end, event.received,
+                     os.getpid(), event.task)):
+                trace.append({'name': name, 'ph': 'X', 'pid': pid,
+                              'tid': tid, 'ts': 1e6*(begin-t0),
+                              'dur': 1e6*(end-begin), 'args': sizes})
+        with open(filename, 'w') as fh:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, fh)
+
+    def draw_timeline(self, cnvs, offset=0, cellheight=0.17):
+        """draw one row per worker onto a pyx canvas
+
+           Filled boxes indicate the execution of the tasks and thin
+           lines the time until the result has been received. The
+           vertical lines mark the first submission and the arrival of
+           the last result. The unit of length on the canvas is one
+           second.
+
+        """
+        t0 = min(event.submit for event in self.events)
+        tmax = max(event.received for event in self.events)-t0
+        workers = self.workers()
+        nrproc = len(workers)
+        for x in (0, tmax):
+            cnvs.stroke(path.line(x, -0.2*cellheight+offset,
+                                  x, (nrproc+0.2)*cellheight+offset))
+        for event in self.events:
+            nr = workers[(event.pid, event.thread)]
+            hue = 0.667*nr/max(nrproc-1, 1)
+            colours = color.hsb(hue, 1, 0.3)
+            colourf = color.hsb(hue, 0.2, 1)
+            ypos = nr*cellheight+offset
+            cnvs.stroke(path.rect(event.start-t0, ypos,
+                                  event.end-event.start, 0.8*cellheight),
+                        [colours, deco.filled([colourf])])
+            cnvs.stroke(path.line(event.end-t0, ypos+0.4*cellheight,
+                                  event.received-t0, ypos+0.4*cellheight),
+                        [colours])
+        return nrproc, tmax
+
+if __name__ == '__main__':
+    # a cancelled task must not block as_completed
+    with TracingExecutor(futures.ThreadPoolExecutor(max_workers=1)) as ex:
+        wait_for = [ex.submit(time.sleep, 0.1) for _ in range(3)]
+        assert wait_for[2].cancel()
+        completed = list(futures.as_completed(wait_for, timeout=5))
+        assert len(completed) == 3 and wait_for[2].cancelled()
+    print('ok')
@@ -0,0 +1,280 @@
+"""statistical profiler sampling the Python stacks at regular intervals
+
+usage: python sampler.py [-r RATE] [-t] [-o FILE] [--plot FILE] script.py [args]
+
+The script is run with a timer signal sampling the call stacks RATE times
+per second of CPU time. Workers of a ProcessPoolExecutor are sampled as
+well and their profiles are merged with the profile of the main process.
+The result is written in the collapsed stack format, one line per stack
+with the frames separated by semicolons followed by the CPU time in
+microseconds spent in it, which is understood by flamegraph.pl and
+speedscope. Optionally, a flame graph is drawn with matplotlib.
+
+Python signal handlers only run between bytecodes, so that all timer
+expirations during a long call of compiled code, e.g. a NumPy function,
+lead to a single sample. Each sample is therefore weighted by the CPU
+time consumed since the previous one.
+
+In contrast to cProfile and line_profiler, the execution of the profiled
+code is not slowed down apart from the short interruptions by the signal.
+
+"""
+import argparse
+import builtins
+from collections import Counter
+from concurrent.futures import process
+import glob
+import os
+import signal
+import sys
+import tempfile
+import threading
+import time
+import types
+import zlib
+
+def _label(code):
+    return (f'{code.co_name} '
+            f'({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+
+def _stack(frame):
+    # frames from the outermost to the innermost call
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame.f_code))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+def _thread_time(ident):
+    # CPU time of another thread of this process
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except OSError:
+        return None
+
+class Sampler:
+    """collects the stack when the profiling timer expires
+
+       Only one sampler can be active per process since it relies on
+       the signal SIGPROF whose handler runs in the main thread. The
+       stacks are weighted by the CPU time in seconds since the
+       previous sample. If all_threads is True, the stacks of the other
+       threads are recorded with the CPU time of the respective thread,
+       and the main thread is charged with the remaining CPU time of
+       the process. The skip outermost frames are dropped as well as
+       all frames preceding the last call of a function named root.
+
+    """
+    def __init__(self, rate=200, all_threads=False, skip=0, root=None):
+        self.interval = 1/rate
+        self.all_threads = all_threads
+        self.skip = skip
+        self.root = root
+        self.stacks = Counter()
+        self._active = False
+        self._last = 0
+        self._thread_times = {}
+
+    def _record(self, frame, weight):
+        # a signal arriving before the guard in _handler is set runs a
+        # nested handler, whose frame then is the one of the outer handler,
+        # the stack is therefore taken from where the outermost handler
+        # interrupted the program
+        outer = frame
+        while outer is not None:
+            if outer.f_code is Sampler._handler.__code__:
+                frame = outer.f_back
+            outer = outer.f_back
+        labels = _stack(frame).split(';')[self.skip:]
+        if self.root is not None:
+            for nr in range(len(labels)-1, -1, -1):
+                if labels[nr].startswith(self.root+' ('):
+                    labels = labels[nr:]
+                    break
+        self.stacks[';'.join(labels)] += weight
+
+    def _handler(self, signum, frame):
+        # a signal arriving while the handler runs is ignored, its CPU
+        # time is accounted for by the next sample
+        if self._active:
+            return
+        self._active = True
+        try:
+            now = time.process_time()
+            weight = now-self._last
+            self._last = now
+            if self.all_threads:
+                weight = weight-self._sample_threads()
+            self._record(frame, max(weight, 0))
+        finally:
+            self._active = False
+
+    def _sample_threads(self):
+        # records the threads other than the main thread and returns the
+        # CPU time attributed to them
+        main = threading.main_thread().ident
+        thread_times = {}
+        total = 0
+        for ident, thread_frame in sys._current_frames().items():
+            if ident == main:
+                continue
+            cpu_time = _thread_time(ident)
+            if cpu_time is None:
+                continue
+            thread_times[ident] = cpu_time
+            weight = cpu_time-self._thread_times.get(ident, 0)
+            if weight > 0:
+                self._record(thread_frame, weight)
+                total = total+weight
+        self._thread_times = thread_times
+        return total
+
+    def start(self):
+        self._last = time.process_time()
+        if self.all_threads:
+            self._thread_times = {
+                ident: _thread_time(ident) or 0
+                for ident in sys._current_frames()}
+        signal.signal(signal.SIGPROF, self._handler)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+
+    def write(self, filename, prefix=''):
+        # the CPU time is given in microseconds since the collapsed stack
+        # format requires integers
+        with open(filename, 'w') as fh:
+            for stack, weight in self.stacks.items():
+                count = round(1e6*weight)
+                if count > 0:
+                    fh.write(f'{prefix}{stack} {count}\n')
+
+def _start_worker(directory, rate, all_threads, initializer, initargs):
+    # initializer of the workers of a ProcessPoolExecutor, the profile is
+    # written when the worker process finishes
+    from multiprocessing import util
+
+    sampler = Sampler(rate, all_threads, root='_process_worker')
+    sampler.start()
+
+    def finish():
+        sampler.stop()
+        sampler.write(os.path.join(directory, f'{os.getpid()}.folded'),
+                      prefix='worker;')
+
+    util.Finalize(None, finish, exitpriority=100)
+    if initializer is not None:
+        initializer(*initargs)
+
+def sample_workers(directory, rate, all_threads=False):
+    """make all ProcessPoolExecutors created from now on sample their workers"""
+    original_init = process.ProcessPoolExecutor.__init__
+
+    def __init__(self, max_workers=None, mp_context=None, initializer=None,
+                 initargs=(), **kwargs):
+        original_init(self, max_workers, mp_context, _start_worker,
+                      (directory, rate, all_threads, initializer, initargs),
+                      **kwargs)
+
+    process.ProcessPoolExecutor.__init__ = __init__
+
+def merge(filenames):
+    stacks = Counter()
+    for filename in filenames:
+        with open(filename) as fh:
+            for line in fh:
+                stack, count = line.rstrip('\n').rsplit(' ', 1)
+                stacks[stack] += int(count)
+    return stacks
+
+def run_script(path, args):
+    # execute the script as main module, so that it can be found by
+    # workers started with the spawn or forkserver method
+    sys.argv = [path]+list(args)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(path)))
+    main = types.ModuleType('__main__')
+    main.__file__ = path
+    main.__builtins__ = builtins
+    sys.modules['__main__'] = main
+    with open(path, 'rb') as fh:
+        code = compile(fh.read(), path, 'exec')
+    exec(code, main.__dict__)
+
+def flamegraph(stacks, filename, minwidth=0.002):
+    """draw a flame graph of collapsed stacks with matplotlib
+
+       Frames with a fraction of the CPU time below minwidth are not
+       shown.
+
+    """
+    import matplotlib.pyplot as plt
+
+    total = sum(stacks.values())
+    fig, ax = plt.subplots(figsize=(12, 6))
+    maxdepth = 0
+
+    def draw(prefix, depth, start):
+        # children of the frame given by prefix, sorted by name
+        nonlocal maxdepth
+        children = Counter()
+        for stack, count in stacks.items():
+            if len(stack) > depth and stack[:depth] == prefix:
+                children[stack[depth]] += count
+        for name in sorted(children):
+            width = children[name]/total
+            if width >= minwidth:
+                maxdepth = max(maxdepth, depth)
+                ax.barh(depth, width, left=start, height=1, edgecolor='white',
+                        color=plt.cm.autumn(zlib.crc32(name.encode()) % 256))
+                if width > 0.05:
+                    ax.text(start+0.002, depth, name, va='center',
+                            fontsize=7, clip_on=True)
+                draw(prefix+(name,), depth+1, start)
+            start = start+width
+
+    stacks = {tuple(stack.split(';')): count
+              for stack, count in stacks.items()}
+    draw((), 0, 0)
+    ax.set_xlim(0, 1)
+    ax.set_ylim(-0.5, maxdepth+0.5)
+    ax.set_xlabel('fraction of CPU time')
+    ax.set_yticks([])
+    fig.tight_layout()
+    fig.savefig(filename)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('-r', '--rate', type=float, default=200,
+                        help='samples per second of CPU time')
+    parser.add_argument('-t', '--threads', action='store_true',
+                        help='sample all threads, not only the main thread')
+    parser.add_argument('-o', '--output', default='profile.folded')
+    parser.add_argument('--plot', help='file name of the flame graph')
+    parser.add_argument('script')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # the initializer of the workers has to be importable from this module
+    # and not from __main__ which will be replaced by the script
+    from sampler import Sampler, flamegraph, merge, run_script, sample_workers
+
+    with tempfile.TemporaryDirectory() as directory:
+        sample_workers(directory, args.rate, args.threads)
+        # the frames of this module and of run_script are not recorded
+        sampler = Sampler(args.rate, args.threads, skip=2)
+        sampler.start()
+        try:
+            run_script(args.script, args.args)
+        finally:
+            sampler.stop()
+            main_file = os.path.join(directory, 'main.folded')
+            sampler.write(main_file, prefix='main;')
+            stacks = merge(glob.glob(os.path.join(directory, '*.folded')))
+    with open(args.output, 'w') as fh:
+        for stack, count in sorted(stacks.items()):
+            fh.write(f'{stack} {count}\n')
+    if args.plot:
+        flamegraph(stacks, args.plot)
@@ -0,0 +1,186 @@
+from collections import deque
+from functools import lru_cache
+from multiprocessing import shared_memory
+import math
+
+import numpy as np
+
+from backends import attach_shared, default_backend, executor, shared
+
+# size of a segment in bytes chosen to fit into a typical L2 cache
+SEGMENT_BYTES = 2**18
+# primes up to this value are crossed out by strided slices
+STRIDED_PRIMES_MAX = 1024
+# odd primes whose multiples are removed by the wheel patterns
+WHEEL_PRIMES = {30: (3, 5), 210: (3, 5, 7), 2310: (3, 5, 7, 11),
+                30030: (3, 5, 7, 11, 13)}
+
+def sieve(nmax):
+    # the sieve of Eratosthenes as discussed in the manuscript
+    is_prime = np.ones(nmax+1, dtype=bool)
+    is_prime[:2] = False
+    for j in range(2, math.isqrt(nmax)+1):
+        if is_prime[j]:
+            is_prime[j*j::j] = False
+    return np.flatnonzero(is_prime)
+
+def cross_out(bits, base, primes):
+    # bit i of the packed array bits (in little-endian bit order) represents
+    # the odd number base+2*i, multiples of the odd primes are cleared
+    nbits = 8*len(bits)
+    primes = primes[primes*primes < base+2*nbits]
+    first = np.maximum(primes*primes, (base+primes-1)//primes*primes)
+    first = first+primes*(first % 2 == 0)
+    starts = (first-base)//2
+    # odd multiples of p are p bits apart, so that every eighth of them
+    # occupies the same bit in bytes which are p apart
+    small = primes <= STRIDED_PRIMES_MAX
+    for p, start in zip(primes[small].tolist(), starts[small].tolist()):
+        for idx in range(start, min(start+8*p, nbits), p):
+            bits[idx >> 3::p] &= ~np.uint8(1 << (idx & 7))
+    # for larger primes, the eight slices per prime would be short so that
+    # all their multiples are determined and cleared at once
+    primes = primes[~small]
+    starts = starts[~small]
+    counts = np.maximum((nbits-starts+primes-1)//primes, 0)
+    offsets = np.cumsum(counts)-counts
+    idx = (np.repeat(starts, counts)
+           +(np.arange(np.sum(counts))-np.repeat(offsets, counts))
+            *np.repeat(primes, counts))
+    mask = (1 << (idx & 7)).astype(np.uint8)
+    np.bitwise_and.at(bits, idx >> 3, ~mask)
+
+@lru_cache(maxsize=None)
+def wheel_pattern(wheel):
+    # the multiples of the wheel primes among the odd numbers repeat after
+    # period bits and thus after period bytes in the packed representation
+    period = math.prod(WHEEL_PRIMES[wheel])
+    flags = np.ones(8*period, dtype=np.uint8)
+    for p in WHEEL_PRIMES[wheel]:
+        flags[(p-1)//2::p] = 0
+    pattern = np.packbits(flags, bitorder='little')
+    pattern.flags.writeable = False
+    return pattern
+
+def stamp(base, nbytes, wheel):
+    pattern = wheel_pattern(wheel)
+    period = len(pattern)
+    # find the bit offset into the pattern which is aligned to a byte
+    offset = (base-1)//2 % period
+    while offset % 8:
+        offset = offset+period
+    bits = np.resize(np.roll(pattern, -(offset//8)), nbytes)
+    # the wheel primes themselves have been removed as well
+    for p in WHEEL_PRIMES[wheel]:
+        idx = (p-base)//2
+        if base <= p and idx < 8*nbytes:
+            bits[idx >> 3] |= np.uint8(1 << (idx & 7))
+    return bits
+
+def odd_segment(base, nbytes, primes, wheel=None):
+    if wheel is None:
+        bits = np.full(nbytes, 0xff, dtype=np.uint8)
+        cross_out(bits, base, primes)
+    else:
+        bits = stamp(base, nbytes, wheel)
+        cross_out(bits, base, primes[len(WHEEL_PRIMES[wheel]):])
+    if base == 1:
+        bits[0] &= 0xfe
+    return bits
+
+def segment_bases(lo, hi, segment_bytes=SEGMENT_BYTES):
+    # yields the first odd number and the number of odd numbers for each
+    # segment covering the interval [lo, hi)
+    base = max(lo, 1) | 1
+    while base < hi:
+        nodd = min(8*segment_bytes, (hi-base+1)//2)
+        yield base, nodd
+        base = base+16*segment_bytes
+
+def segment_flags(base, nodd, primes, wheel=None):
+    bits = odd_segment(base, (nodd+7)//8, primes, wheel)
+    return np.unpackbits(bits, bitorder='little')[:nodd]
+
+def prime_segments(lo, hi, segment_bytes=SEGMENT_BYTES, primes=None,
+                   wheel=30030):
+    # yields the primes in [lo, hi) segment by segment, the memory required
+    # is determined by the segment size and the primes up to sqrt(hi)
+    if hi <= lo:
+        return
+    if primes is None:
+        primes = sieve(math.isqrt(hi-1))[1:]
+    if lo <= 2 < hi:
+        yield np.array([2])
+    for base, nodd in segment_bases(lo, hi, segment_bytes):
+        yield base+2*np.flatnonzero(segment_flags(base, nodd, primes, wheel))
+
+def _count(lo, hi, wheel, primes=None):
+    # worker processes use the base primes in shared memory, threads
+    # receive them as argument
+    if primes is None:
+        primes = shared('primes')
+    count = int(lo <= 2 < hi)
+    for base, nodd in segment_bases(lo, hi):
+        flags = segment_flags(base, nodd, primes, wheel)
+        count = count+int(np.sum(flags))
+    return count
+
+def _primes(lo, hi, wheel, primes=None):
+    if primes is None:
+        primes = shared('primes')
+    return np.concatenate([np.array([], dtype=np.int64)]
+                          +list(prime_segments(lo, hi, primes=primes,
+                                               wheel=wheel)))
+
+def _stream(ex, function, lo, hi, span, max_workers, wheel, primes=None):
+    # only a bounded number of tasks is in flight so that results can be
+    # consumed as a stream
+    pending = deque()
+    for start in range(lo, hi, span):
+        pending.append(ex.submit(function, start, min(start+span, hi),
+                                 wheel, primes))
+        if len(pending) >= 2*max_workers:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _pool_map(function, lo, hi, max_workers, task_segments, wheel,
+              backend=None):
+    # each task sieves task_segments segments, for processes the odd base
+    # primes are placed in shared memory once, threads share them anyway
+    primes = sieve(math.isqrt(max(hi-1, 0)))[1:]
+    span = 16*SEGMENT_BYTES*task_segments
+    if (backend or default_backend()) == 'thread':
+        with executor('thread', max_workers) as ex:
+            yield from _stream(ex, function, lo, hi, span, max_workers,
+                               wheel, primes)
+        return
+    shm = shared_memory.SharedMemory(create=True, size=max(8*len(primes), 1))
+    try:
+        np.ndarray(len(primes), dtype=np.int64, buffer=shm.buf)[:] = primes
+        with executor('process', max_workers, initializer=attach_shared,
+                      initargs=('primes', shm.name, len(primes),
+                                np.int64)) as ex:
+            yield from _stream(ex, function, lo, hi, span, max_workers, wheel)
+    finally:
+        shm.close()
+        shm.unlink()
+
+def count_primes(lo, hi, max_workers=4, task_segments=4, wheel=30030,
+                 backend=None):
+    return sum(_pool_map(_count, lo, hi, max_workers, task_segments, wheel,
+                         backend))
+
+def primes_in(lo, hi, max_workers=4, task_segments=4, wheel=30030,
+              backend=None):
+    # yields arrays of consecutive primes in [lo, hi) in increasing order
+    yield from _pool_map(_primes, lo, hi, max_workers, task_segments, wheel,
+                         backend)
+
+if __name__ == '__main__':
+    import time
+
+    for nmax in (10**6, 10**7, 10**8):
+        start = time.time()
+        nprimes = sum(len(p) for p in prime_segments(0, nmax+1))
+        print(nmax, nprimes, time.time()-start)
@@ -0,0 +1,35 @@
+import os
+import time
+
+from pyx import color, deco, graph
+
+from sieve import count_primes
+
+nmax = 10**10
+datafile = 'sieve_time.dat'
+if not os.path.exists(datafile):
+    with open(datafile, 'w') as fh:
+        for nworkers in range(1, os.cpu_count()+1):
+            start = time.time()
+            count_primes(0, nmax, max_workers=nworkers)
+            fh.write(f'{nworkers} {time.time()-start}\n')
+
+with open(datafile) as fh:
+    t_parallel = []
+    for line in fh:
+        elems = line.rstrip('\n').split()
+        t_parallel.append((int(elems[0]), float(elems[1])))
+t_one = t_parallel[0][1]
+t_parallel = [(n, t_one/t) for n, t in t_parallel]
+
+g = graph.graphxy(width=8,
+        x=graph.axis.linear(min=1, title="number of workers"),
+        y=graph.axis.linear(title="acceleration"))
+g.plot(graph.data.points(t_parallel, x=1, y=2),
+       [graph.style.line([]),
+        graph.style.symbol(symbol=graph.style.symbol.circle,
+                           size=0.1,
+                           symbolattrs=[deco.filled([color.grey(1)])])
+       ])
+g.writePDFfile()
+g.writeGSfile(device="png16m", resolution=600)
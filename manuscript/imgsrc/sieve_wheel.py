@@ -0,0 +1,37 @@
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from sieve import prime_segments, sieve
+
+def t_sieve(nmax):
+    start = time.perf_counter()
+    sieve(nmax)
+    return time.perf_counter()-start
+
+def t_segments(nmax, wheel):
+    start = time.perf_counter()
+    for primes in prime_segments(0, nmax+1, wheel=wheel):
+        pass
+    return time.perf_counter()-start
+
+nvals = 10**np.arange(6, 10)
+wheels = (None, 30, 210, 30030)
+with open('sieve_wheel.dat', 'w') as fh:
+    tvals = np.empty((len(nvals), len(wheels)+1))
+    for nr, nmax in enumerate(nvals):
+        tvals[nr, 0] = t_sieve(nmax)
+        for nw, wheel in enumerate(wheels):
+            tvals[nr, nw+1] = t_segments(nmax, wheel)
+        fh.write(' '.join(map(str, [nmax]+tvals[nr].tolist()))+'\n')
+
+plt.rc('text', usetex=True)
+plt.xscale('log')
+plt.xlabel('$n_\\mathrm{max}$', fontsize=20)
+plt.ylabel('$t_\\mathrm{sieve}/t$', fontsize=20)
+for nw, wheel in enumerate(wheels):
+    label = 'odd only' if wheel is None else f'wheel {wheel}'
+    plt.plot(nvals, tvals[:, 0]/tvals[:, nw+1], 'o-', label=label)
+plt.legend()
+plt.show()
@@ -0,0 +1,214 @@
+"""fit Amdahl type models to measured execution times
+
+The execution time with w workers and n tasks is modelled as
+
+    t(w, n) = a + b/p + c*n/p + g*(1-1/p)/n + d*(w-1)
+
+where a is the serial part, b the parallelizable part, c the overhead per
+task, g describes the waiting for the last tasks and d the overhead per
+worker. p = min(w, cores)+eta*max(w-cores, 0) is the effective number of
+workers where eta is the yield of hyperthreads. The linear parameters are
+obtained by non-negative least squares with respect to the relative
+deviations, eta by scanning. The parallel fraction of Amdahl's law is
+f = b/(a+b).
+
+"""
+import argparse
+
+import numpy as np
+from scipy.optimize import nnls
+
+def read_table(filename):
+    # numbers of a data file, lines starting with # are ignored
+    with open(filename) as fh:
+        return np.array([[float(x) for x in line.split()] for line in fh
+                         if line.strip() and not line.startswith('#')])
+
+def effective_workers(w, cores, eta):
+    w = np.asarray(w, dtype=float)
+    return np.minimum(w, cores)+eta*np.maximum(w-cores, 0)
+
+def _design(w, n, p, terms):
+    columns = {'a': np.ones_like(p), 'b': 1/p, 'c': n/p,
+               'g': (1-1/p)/n, 'd': w-1}
+    return np.column_stack([columns[term] for term in terms])
+
+def fit(w, n, t, terms=('a', 'b', 'c', 'g'), cores=None, etas=None):
+    """fit the model to times t measured for w workers and n tasks
+
+       Only the parameters listed in terms are fitted, the others
+       are set to zero. Returns a dictionary with the parameters,
+       eta and the root mean square relative deviation.
+
+    """
+    w, n, t = (np.asarray(v, dtype=float) for v in (w, n, t))
+    cores = np.inf if cores is None else cores
+    if etas is None:
+        etas = np.linspace(0, 1, 101) if np.any(w > cores) else (1.,)
+    best = None
+    for eta in etas:
+        p = effective_workers(w, cores, eta)
+        matrix = _design(w, n, p, terms)/t[:, np.newaxis]
+        params, residual = nnls(matrix, np.ones_like(t))
+        rms = residual/np.sqrt(len(t))
+        if best is None or rms < best['rms']:
+            best = dict(zip(terms, params), eta=eta, rms=rms)
+    for term in 'abcgd':
+        best.setdefault(term, 0.)
+    best['cores'] = cores
+    best['f'] = best['b']/(best['a']+best['b'])
+    return best
+
+def model(params, w, n=1):
+    w = np.asarray(w, dtype=float)
+    n = np.asarray(n, dtype=float)
+    p = effective_workers(w, params['cores'], params['eta'])
+    return (params['a']+params['b']/p+params['c']*n/p
+            +params['g']*(1-1/p)/n+params['d']*(w-1))
+
+def amdahl(f, p):
+    return 1/(1-f+f/p)
+
+def gustafson(f, p):
+    """scaled speedup for a problem growing with p
+
+       The serial fraction of the parallel run time follows from the
+       parallel fraction f of the serial run time.
+
+    """
+    s = (1-f)/(1-f+f/p)
+    return s+p*(1-s)
+
+def karp_flatt(speedup, p):
+    # experimentally determined serial fraction
+    return (1/speedup-1/p)/(1-1/p)
+
+def best_tasks(params, workers):
+    """number of tasks minimizing the model for a given number of workers
+
+       The overhead c*n/p grows while the waiting for the last tasks
+       g*(1-1/p)/n decreases with the number of tasks. Without both
+       contributions, the number of tasks is set to the number of
+       workers.
+
+    """
+    p = effective_workers(workers, params['cores'], params['eta'])
+    if params['c'] <= 0 or params['g'] <= 0:
+        return float(workers)
+    return max(1., np.sqrt(params['g']*(p-1)/params['c']))
+
+def best_configuration(params, maxworkers):
+    # number of workers and tasks with the shortest execution time
+    configurations = [(w, best_tasks(params, w))
+                      for w in range(1, maxworkers+1)]
+    return min(configurations, key=lambda wn: model(params, *wn))
+
+def plot(tiles, tile_params, threads, thread_params, workers, filename):
+    from pyx import canvas, color, deco, graph, style
+
+    symbol = [graph.style.symbol(symbol=graph.style.symbol.circle, size=0.1,
+                                 symbolattrs=[deco.filled([color.grey(1)])])]
+    c = canvas.canvas()
+    logparter = graph.axis.parter.log(tickpreexps=[
+        graph.axis.parter.preexp([graph.axis.tick.rational(1, 1)], 2)])
+    ndiv, t4, t1 = tiles.T
+    g1 = graph.graphxy(width=8,
+            x=graph.axis.log(min=1, max=ndiv[-1], parter=logparter,
+                             title='number of divisions per axis'),
+            y=graph.axis.lin(min=0, title='acceleration'))
+    g1.plot(graph.data.values(x=ndiv, y=t1[0]/t4), symbol)
+    ndivs = np.logspace(0, np.log2(ndiv[-1]), 100, base=2)
+    g1.plot(graph.data.values(x=ndivs, y=model(tile_params, 1, 1)
+                              /model(tile_params, workers, ndivs**2)),
+            [graph.style.line([style.linestyle.solid])])
+    nthreads, t = threads.T
+    g2 = graph.graphxy(width=8, xpos=g1.xpos+g1.width+2,
+            x=graph.axis.linear(min=1, max=nthreads[-1],
+                                title='number of threads'),
+            y=graph.axis.linear(min=1, title='acceleration'))
+    g2.plot(graph.data.values(x=nthreads, y=t[0]/t), symbol)
+    w = np.linspace(1, nthreads[-1], 100)
+    g2.plot(graph.data.values(x=w, y=model(thread_params, 1)
+                              /model(thread_params, w)),
+            [graph.style.line([style.linestyle.solid])])
+    g2.plot(graph.data.values(x=w, y=amdahl(thread_params['f'], w)),
+            [graph.style.line([style.linestyle.dotted])])
+    c.insert(g1)
+    c.insert(g2)
+    c.writePDFfile(filename)
+    c.writeGSfile(filename+'.png', device='png16m', resolution=600)
+
+def report(title, params):
+    print(title)
+    print(f'  serial part:       {params["a"]:9.3f} s')
+    print(f'  parallel part:     {params["b"]:9.3f} s (f = {params["f"]:.4f})')
+    print(f'  overhead per task: {params["c"]:9.2e} s')
+    print(f'  last task waiting: {params["g"]:9.2e} s')
+    print(f'  overhead/worker:   {params["d"]:9.2e} s')
+    print(f'  hyperthread yield: {params["eta"]:9.2f}')
+    print(f'  rms deviation:     {100*params["rms"]:9.1f} %')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--tiles', default='i7-6700hq.dat',
+                        help='columns ndiv t4 t1 as in parallel_time.py')
+    parser.add_argument('--single-reference', action='store_true',
+                        help='columns ndiv t1 t4 where t1 is the time of a '
+                             'single\nprocess without subdivision as in '
+                             'the presentation')
+    parser.add_argument('--threads', default='numba_parallel.dat',
+                        help='columns nthreads t as in numba_parallel.py')
+    parser.add_argument('--cores', type=int, default=4,
+                        help='physical cores of the measuring machine')
+    parser.add_argument('--target-cores', type=int,
+                        help='physical cores of the target machine')
+    parser.add_argument('--target-threads', type=int,
+                        help='hardware threads of the target machine')
+    parser.add_argument('--plot', help='base name of the graph')
+    args = parser.parse_args()
+    target_cores = args.target_cores or args.cores
+    target_threads = args.target_threads or 2*target_cores
+
+    tiles = read_table(args.tiles)[:, :3]
+    if args.single_reference:
+        tiles = tiles[:, (0, 2, 1)]
+        ndiv, t4, t1 = tiles.T
+        w = np.concatenate((np.full_like(t4, 4), [1]))
+        n = np.concatenate((ndiv**2, [1]))
+        times = np.concatenate((t4, t1[:1]))
+    else:
+        ndiv, t4, t1 = tiles.T
+        w = np.concatenate((np.full_like(t4, 4), np.ones_like(t1)))
+        n = np.concatenate((ndiv**2, ndiv**2))
+        times = np.concatenate((t4, t1))
+    tile_params = fit(w, n, times, cores=args.cores)
+    report(f'process pool ({args.tiles})', tile_params)
+    print('  Karp-Flatt serial fraction:',
+          ' '.join(f'{e:.3f}' for e in karp_flatt(t1/t4, 4)))
+
+    threads = read_table(args.threads)[:, :2]
+    nthreads, t = threads.T
+    thread_params = fit(nthreads, 1, t, terms=('a', 'b', 'd'),
+                        cores=args.cores)
+    report(f'threads ({args.threads})', thread_params)
+    print('  Karp-Flatt serial fraction:',
+          ' '.join(f'{e:.3f}' for e in karp_flatt(t[0]/t[1:], nthreads[1:])))
+    print('  Gustafson scaled speedup:  ',
+          ' '.join(f'{s:.2f}' for s in gustafson(thread_params['f'],
+                                                  nthreads)))
+
+    # the process pool was measured for four processes only, the yield of
+    # hyperthreads is taken from the thread data
+    if tile_params['cores'] >= 4:
+        tile_params['eta'] = thread_params['eta']
+    tile_params['cores'] = thread_params['cores'] = target_cores
+    print(f'target machine with {target_cores} cores, '
+          f'{target_threads} hardware threads:')
+    nthreads_best, _ = best_configuration(thread_params, target_threads)
+    print(f'  threads: {nthreads_best}')
+    workers, ntasks = best_configuration(tile_params, target_threads)
+    print(f'  processes: {workers}, tasks: {ntasks:.0f} '
+          f'({np.sqrt(ntasks):.1f} divisions per axis)')
+    if args.plot:
+        plot(tiles, tile_params, threads, thread_params, 4, args.plot)
@@ -1,30 +1,166 @@
+"""execution times of universal functions compared to loops over math functions
+
+Without argument, the ratio of the execution times of a loop over math.sin
+and of np.sin is plotted as a function of the array size. With the
+argument --suite, the time per element is determined for several ufuncs,
+dtypes and array sizes ranging from the L1 cache to main memory, both for
+the allocating form and for the form writing into an existing array via
+out=. The results are written to uf_runtime.dat.
+
+"""
+import cmath
 import math
+import sys
+import time
+
 import matplotlib.pyplot as plt
 import numpy as np
-import time
+from scipy.special import airy, jv
+
+DTYPES = (np.float32, np.float64, np.complex128)
+
+def _math_function(name, dtype):
+    # scalar counterpart of the ufunc or None if there is none
+    module = cmath if np.issubdtype(dtype, np.complexfloating) else math
+    if name == 'hypot':
+        return None if module is cmath else math.hypot
+    return getattr(module, name, None)
+
+# name, ufunc, number of array arguments, extra arguments prepended
+UFUNCS = (('sin', np.sin, 1, ()),
+          ('exp', np.exp, 1, ()),
+          ('hypot', np.hypot, 2, ()),
+          ('jv', jv, 1, (1.5,)),
+          ('airy', airy, 1, ()))
+
+def cache_sizes():
+    """sizes in bytes of the data caches of the first CPU
+
+       The values of the i7-6700HQ are used if the information is not
+       available from the sys file system.
+
+    """
+    sizes = {1: 32*1024, 2: 256*1024, 3: 6*1024**2}
+    try:
+        for index in range(8):
+            directory = f'/sys/devices/system/cpu/cpu0/cache/index{index}/'
+            with open(directory+'type') as fh:
+                if fh.read().strip() == 'Instruction':
+                    continue
+            with open(directory+'level') as fh:
+                level = int(fh.read())
+            with open(directory+'size') as fh:
+                size = fh.read().strip()
+            sizes[level] = int(size.rstrip('KM'))*{'K': 1024, 'M': 1024**2}.get(
+                size[-1], 1)
+    except OSError:
+        pass
+    return sizes
+
+def timing(function, *args, repeat=5, mintime=0.01, **kwargs):
+    """minimal execution time of function(*args, **kwargs)
+
+       After an untimed warm-up call, the number of calls per
+       measurement is calibrated so that each of the repeat
+       measurements takes at least mintime. The calibration runs are
+       not part of the measurements.
+
+    """
+    function(*args, **kwargs)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function(*args, **kwargs)
+        elapsed = time.perf_counter()-start
+        if elapsed >= mintime:
+            break
+        number = 2*number if elapsed == 0 else max(
+            2*number, int(1.2*number*mintime/elapsed))
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function(*args, **kwargs)
+        times.append(time.perf_counter()-start)
+    return min(times)/number
+
+def math_loop(function, *args):
+    for x in zip(*args):
+        y = function(*x)
+
+def arguments(nargs, dtype, n):
+    rng = np.random.default_rng(12345)
+    args = [rng.uniform(0, 2*np.pi, n).astype(dtype) for _ in range(nargs)]
+    if np.issubdtype(dtype, np.complexfloating):
+        args = [x+1j*rng.uniform(0, 1, n) for x in args]
+    return args
+
+def outputs(ufunc, prepend, args):
+    # arrays receiving the results of the ufunc in the form with out=
+    results = ufunc(*prepend, *(x[:1] for x in args))
+    if isinstance(results, tuple):
+        return tuple(np.empty(args[0].shape, dtype=r.dtype) for r in results)
+    return np.empty(args[0].shape, dtype=results.dtype)
+
+def suite(sizes, ufuncs=UFUNCS, dtypes=DTYPES, math_max=2**20):
+    """times per element for all combinations of ufuncs, dtypes and sizes
+
+       Returns tuples (name, dtype, n, t_alloc, t_out, t_math) where
+       t_math is nan if no scalar function exists or n > math_max.
+
+    """
+    results = []
+    for name, ufunc, nargs, prepend in ufuncs:
+        for dtype in dtypes:
+            for n in sizes:
+                args = arguments(nargs, dtype, n)
+                try:
+                    out = outputs(ufunc, prepend, args)
+                except TypeError:
+                    break
+                t_alloc = timing(ufunc, *prepend, *args)
+                t_out = timing(ufunc, *prepend, *args, out=out)
+                function = _math_function(name, dtype)
+                if function is None or n > math_max:
+                    t_math = np.nan
+                else:
+                    t_math = timing(math_loop, function, *args, repeat=3)
+                results.append((name, np.dtype(dtype).name, n,
+                                t_alloc/n, t_out/n, t_math/n))
+    return results
+
+def write_results(filename, results):
+    with open(filename, 'w') as fh:
+        for level, size in sorted(cache_sizes().items()):
+            fh.write(f'# L{level} {size}\n')
+        fh.write('# ufunc dtype n t_alloc t_out t_math (s per element)\n')
+        for name, dtype, n, t_alloc, t_out, t_math in results:
+            fh.write(f'{name:6s} {dtype:10s} {n:9d} '
+                     f'{t_alloc:10.3e} {t_out:10.3e} {t_math:10.3e}\n')
+
+def plot_ratio(maxpower=26):
+    # the figure in the chapter on NumPy
+    nvals = 2**np.arange(0, maxpower+1)
+    tvals = np.empty(nvals.shape, dtype=np.float64)
+    for nr, nmax in enumerate(nvals):
+        xvals = np.linspace(0, 2*np.pi, nmax)
+        t_math = timing(math_loop, math.sin, xvals, repeat=3)
+        t_numpy = timing(np.sin, xvals)
+        tvals[nr] = t_math/t_numpy
+    plt.rc('text', usetex=True)
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.xlabel(r'$n_\mathrm{max}$', fontsize=20)
+    plt.ylabel(r'$t_\mathrm{math}/t_\mathrm{numpy}$', fontsize=20)
+    plt.plot(nvals, tvals, 'o')
+    plt.show()
 
-def sin_math(nmax):
-    xvals = np.linspace(0, 2*np.pi, nmax)
-    start = time.time()
-    for x in xvals:
-        y = math.sin(x)
-    return time.time()-start
-
-def sin_numpy(nmax):
-    xvals = np.linspace(0, 2*np.pi, nmax)
-    start = time.time()
-    yvals = np.sin(xvals)
-    return time.time()-start
-
-maxpower = 26
-nvals = 2**np.arange(0, maxpower+1)
-tvals = np.empty_like(nvals)
-for nr, nmax in enumerate(nvals):
-    tvals[nr] = sin_math(nmax)/sin_numpy(nmax)
-plt.rc('text', usetex=True)
-plt.xscale('log')
-plt.yscale('log')
-plt.xlabel('$n_\mathrm{max}$', fontsize=20)
-plt.ylabel('$t_\mathrm{math}/t_\mathrm{numpy}$', fontsize=20)
-plt.plot(nvals, tvals, 'o')
-plt.show()
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--suite':
+        # the largest arrays of doubles exceed the last level cache
+        maxpower = int(np.log2(4*max(cache_sizes().values())/8))
+        sizes = 2**np.arange(4, max(maxpower, 24)+1)
+        write_results('uf_runtime.dat', suite(sizes))
+    else:
+        plot_ratio()
@@ -0,0 +1,44 @@
+import importlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# modules whose numba kernels are compiled eagerly for their declared
+# signatures and cached on disk
+KERNEL_MODULES = ('zeta_numba', 'mandelbrot_numba')
+
+def warm_up():
+    """compile or load from the cache all numba kernels
+
+       Can be called once after installation and serve as initializer
+       of the workers of a ProcessPoolExecutor.
+
+    """
+    timings = {}
+    for name in KERNEL_MODULES:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter()-start
+    return timings
+
+def startup_time(cache_dir):
+    # time needed by a fresh Python process to make all kernels available
+    env = dict(os.environ, NUMBA_CACHE_DIR=cache_dir)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', 'import warmup; warmup.warm_up()'],
+                   env=env, check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter()-start
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--measure':
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cold = startup_time(cache_dir)
+            warm = min(startup_time(cache_dir) for _ in range(5))
+        print(f'startup without cache: {cold:5.2f}s')
+        print(f'startup with cache:    {warm:5.2f}s')
+    else:
+        for name, t in warm_up().items():
+            print(f'{name}: {t:5.2f}s')
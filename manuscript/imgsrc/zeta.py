@@ -0,0 +1,98 @@
+from concurrent import futures
+
+import numpy as np
+from scipy.special import bernoulli, gamma
+
+from backends import default_backend, executor
+
+def zeta_sum(x, nmax):
+    # direct summation as in the chapter on parallel computing, serves as
+    # reference and converges only slowly
+    zetasum = 0
+    for n in range(1, nmax+1):
+        zetasum = zetasum+1/(n**x)
+    return zetasum
+
+def zeta_euler_maclaurin(x, nterms=None, ncorr=12):
+    # the sum is carried out explicitly up to nterms-1, the remainder is
+    # approximated by the Euler-Maclaurin formula with ncorr Bernoulli terms;
+    # subsequent correction terms decrease by about (|x|/(2*pi*nterms))**2,
+    # so that nterms is chosen for each element of x separately
+    x = np.asarray(x)
+    x = x.astype(np.result_type(x, np.float64))
+    if nterms is None:
+        nterms = np.ceil((np.abs(x)+2*ncorr)/(2*np.pi*0.2))
+    nterms = np.broadcast_to(np.asarray(nterms, dtype=np.float64), x.shape)
+    zetasum = np.zeros_like(x)
+    for n in range(1, int(np.max(nterms, initial=1))):
+        zetasum = zetasum+np.where(n < nterms, np.power(float(n), -x), 0)
+    zetasum = (zetasum+np.power(nterms, 1-x)/(x-1)
+               +np.power(nterms, -x)/2)
+    bernoulli_numbers = bernoulli(2*ncorr)
+    term = x*np.power(nterms, -x-1)
+    factorial = 2.
+    for k in range(1, ncorr+1):
+        zetasum = zetasum+bernoulli_numbers[2*k]/factorial*term
+        term = term*(x+2*k-1)*(x+2*k)/nterms**2
+        factorial = factorial*(2*k+1)*(2*k+2)
+    return zetasum
+
+def zeta(x, nmax=None):
+    """Riemann zeta function for real or complex x, scalar or array
+
+       If nmax is given, the series is summed directly up to nmax.
+       Otherwise, the Euler-Maclaurin formula yields double
+       precision with a few tens to hundreds of terms. For
+       negative real parts, the functional equation is used.
+
+    """
+    if nmax is not None:
+        return zeta_sum(x, nmax)
+    x = np.asarray(x)
+    x = x.astype(np.result_type(x, np.float64))
+    reflect = x.real < 0
+    result = np.array(zeta_euler_maclaurin(np.where(reflect, 1-x, x)))
+    xr = x[reflect]
+    result[reflect] = (2**xr*np.pi**(xr-1)*np.sin(np.pi*xr/2)*gamma(1-xr)
+                       *result[reflect])
+    return result[()] if result.ndim == 0 else result
+
+def _zeta_batch(x, nmax, out=None):
+    if out is None:
+        return zeta(x, nmax)
+    out[...] = zeta(x, nmax)
+
+def zeta_batches(x, nmax=None, batchsize=1024, max_workers=4, backend=None):
+    """evaluate zeta for a large array x in batches distributed over workers
+
+       Threads write their batch directly into the result while worker
+       processes return it. By default, threads are used if the GIL is
+       disabled.
+
+    """
+    backend = backend or default_backend()
+    x = np.asarray(x)
+    flat = x.astype(np.result_type(x, np.float64)).ravel()
+    result = np.empty_like(flat)
+    slices = [slice(start, start+batchsize)
+              for start in range(0, flat.size, batchsize)]
+    with executor(backend, max_workers) as ex:
+        if backend == 'thread':
+            wait_for = [ex.submit(_zeta_batch, flat[s], nmax, result[s])
+                        for s in slices]
+            for f in futures.as_completed(wait_for):
+                f.result()
+        else:
+            wait_for = {ex.submit(_zeta_batch, flat[s], nmax): s
+                        for s in slices}
+            for f in futures.as_completed(wait_for):
+                result[wait_for[f]] = f.result()
+    return result.reshape(x.shape)
+
+if __name__ == '__main__':
+    import time
+
+    for x in (2, 2.5, 2+1j):
+        start = time.time()
+        print(f'ζ({x}) = {zeta(x)}')
+        print(f'execution time: {time.time()-start:5.2e}s\n')
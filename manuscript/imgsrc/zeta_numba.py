@@ -0,0 +1,78 @@
+import numba
+from numba import float64, int64, njit, prange, vectorize
+import numpy as np
+
+@vectorize([float64(float64, int64)], target='parallel', cache=True)
+def zeta_plain(x, nmax):
+    # the kernel of the chapter on parallel computing underlying
+    # numba_parallel.dat, summing from the largest term without compensation
+    zetasum = 0.
+    for n in range(nmax):
+        zetasum = zetasum+1./((n+1)**x)
+    return zetasum
+
+@vectorize([float64(float64, int64)], target='parallel', cache=True)
+def zeta_elementwise(x, nmax):
+    # summation starting with the smallest terms, compensated according to
+    # Kahan, each element of x is treated by one thread
+    zetasum = 0.
+    compensation = 0.
+    for n in range(nmax, 0, -1):
+        y = 1./(n**x)-compensation
+        t = zetasum+y
+        compensation = (t-zetasum)-y
+        zetasum = t
+    return zetasum
+
+@njit(float64(float64, int64, int64), parallel=True, cache=True)
+def zeta_reduction(x, nmax, nchunks):
+    # the range of n is split into nchunks chunks which are summed in
+    # parallel, the partial sums are then added with Kahan summation
+    partial = np.zeros(nchunks)
+    chunksize = (nmax+nchunks-1)//nchunks
+    for nchunk in prange(nchunks):
+        nlow = nchunk*chunksize+1
+        nhigh = min((nchunk+1)*chunksize, nmax)
+        zetasum = 0.
+        compensation = 0.
+        for n in range(nhigh, nlow-1, -1):
+            y = 1./(n**x)-compensation
+            t = zetasum+y
+            compensation = (t-zetasum)-y
+            zetasum = t
+        partial[nchunk] = zetasum
+    zetasum = 0.
+    compensation = 0.
+    for nchunk in range(nchunks-1, -1, -1):
+        y = partial[nchunk]-compensation
+        t = zetasum+y
+        compensation = (t-zetasum)-y
+        zetasum = t
+    return zetasum
+
+def zeta(x, nmax):
+    """approximate the Riemann zeta function by summing nmax terms
+
+       If x contains at least as many elements as threads are
+       available, the elements are distributed over the threads.
+       Otherwise, the sum for each element is split among the
+       threads.
+
+    """
+    x = np.asarray(x, dtype=np.float64)
+    nthreads = numba.get_num_threads()
+    if x.size >= nthreads:
+        return zeta_elementwise(x, nmax)
+    result = np.empty_like(x)
+    for index, xval in np.ndenumerate(x):
+        result[index] = zeta_reduction(xval, nmax, 4*nthreads)
+    return result[()] if result.ndim == 0 else result
+
+if __name__ == '__main__':
+    import time
+
+    nmax = 100000000
+    for x in (2., np.linspace(2, 10, 200)):
+        start = time.time()
+        zeta(x, nmax)
+        print(f'execution time: {time.time()-start:5.2f}s')
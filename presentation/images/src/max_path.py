@@ -0,0 +1,56 @@
+import sys
+
+import numpy as np
+
+def read_triangle(fh):
+    # yields the rows of a triangle given line by line in a file object
+    for line in fh:
+        if line.strip():
+            yield np.array(line.split(), dtype=np.int64)
+
+def max_path_sum(rows, path=False):
+    """maximum sum along a path from the top to the bottom of the triangle
+
+       The rows are processed from the top so that they can be read
+       from a stream. sums[j] contains the maximum sum of a path ending
+       at position j of the current row. If path is True, the indices
+       of the maximum path are returned as well, which requires to
+       store one bit per entry of the triangle.
+
+    """
+    sums = np.zeros(1024, dtype=np.int64)
+    choices = []
+    nrows = 0
+    for row in rows:
+        if len(row) != nrows+1:
+            raise ValueError(f'row {nrows} contains {len(row)} entries')
+        if nrows == len(sums):
+            sums = np.concatenate((sums, np.zeros_like(sums)))
+        if nrows > 0:
+            sums[nrows] = sums[nrows-1]
+            if path:
+                choices.append(np.packbits(sums[:nrows-1] > sums[1:nrows]))
+            np.maximum(sums[:nrows-1], sums[1:nrows], out=sums[1:nrows])
+        sums[:nrows+1] += row
+        nrows = nrows+1
+    if nrows == 0:
+        raise ValueError('empty triangle')
+    idx = int(np.argmax(sums[:nrows]))
+    if not path:
+        return int(sums[idx])
+    # walk upwards, at position j of row i the path came from j-1 or j
+    indices = np.empty(nrows, dtype=np.int64)
+    indices[nrows-1] = idx
+    for i in range(nrows-1, 0, -1):
+        if idx == i:
+            idx = i-1
+        elif idx > 0:
+            bits = choices[i-1]
+            idx = idx-int((bits[(idx-1) >> 3] >> (7-(idx-1) % 8)) & 1)
+        indices[i-1] = idx
+    return int(sums[indices[nrows-1]]), indices
+
+if __name__ == '__main__':
+    with open(sys.argv[1]) as fh:
+        total, indices = max_path_sum(read_triangle(fh), path=True)
+    print(total)